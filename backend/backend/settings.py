@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     'django.contrib.sitemaps',
     'django.contrib.sites',
+    'django.contrib.postgres',
 
     # Third party
     "rest_framework",
@@ -155,6 +156,30 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Periodic jobs (run `celery -A backend beat` alongside the worker)
+CELERY_BEAT_SCHEDULE = {
+    # Write buffered vehicle views to the database
+    'flush-vehicle-views': {
+        'task': 'core.tasks.flush_vehicle_views',
+        'schedule': timedelta(seconds=30),
+    },
+    # Recompute today's (and yesterday's) daily analytics rollups
+    'rollup-daily-analytics': {
+        'task': 'core.tasks.rollup_daily_analytics',
+        'schedule': timedelta(minutes=5),
+    },
+    # Rebase and trim the trending leaderboard scores
+    'maintain-trending-index': {
+        'task': 'core.tasks.maintain_trending_index',
+        'schedule': timedelta(hours=1),
+    },
+    # Create upcoming analytics partitions and expire old ones
+    'manage-analytics-partitions': {
+        'task': 'core.tasks.manage_analytics_partitions',
+        'schedule': timedelta(days=1),
+    },
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -269,6 +294,20 @@ TEMPLATES = [
 WSGI_APPLICATION = "backend.wsgi.application"
 ASGI_APPLICATION = "backend.asgi.application"
 
+# Cache Configuration
+# Shared Redis cache so versioned marketplace keys and hit/miss counters are
+# consistent across workers. Cache outages degrade to misses, not errors.
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL', 'redis://127.0.0.1:6379/1'),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'IGNORE_EXCEPTIONS': True,
+        },
+    }
+}
+
 # Channels Configuration
 CHANNEL_LAYERS = {
     'default': {
@@ -428,3 +467,17 @@ ELASTICSEARCH_DSL = {
 
 # Optional: Disable Elasticsearch auto-sync (use signals instead)
 ELASTICSEARCH_DSL_AUTOSYNC = False
+
+# Database search fallback: minimum pg_trgm word similarity (0-1) for a
+# fuzzy make/model/location match. Lower is more forgiving of typos.
+SEARCH_TRIGRAM_THRESHOLD = float(os.getenv('SEARCH_TRIGRAM_THRESHOLD', '0.5'))
+
+# Raw VehicleView/WebsiteVisit rows are kept in monthly partitions for this
+# many months (daily rollups are kept forever). 0 disables expiry.
+ANALYTICS_RETENTION_MONTHS = int(os.getenv('ANALYTICS_RETENTION_MONTHS', '13'))
+
+# Live dashboard counter changes are pushed to admins at most this often
+DASHBOARD_PUSH_INTERVAL_MS = int(os.getenv('DASHBOARD_PUSH_INTERVAL_MS', '1000'))
+
+# Trending leaderboard: an event counts half as much after this many hours
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '24'))
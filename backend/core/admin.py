@@ -4,7 +4,7 @@ from django.contrib.auth.models import User
 from .models import Vehicle, Bid, Profile, VehicleImage, Notification, VehicleSearch
 from .models import WebsiteVisit, VehicleView
 from .models import (
-    QuoteRequest, NotificationPreference, ExportConfiguration, ExportLog,
+    QuoteRequest, NotificationPreference, ExportConfiguration, ExportLog, ExportJob,
     Inquiry, JobPosition, JobApplication, Article, Report, SellerReview, SellerBadge,
     VehicleDraft
 )
@@ -13,10 +13,35 @@ from django.utils import timezone
 from django.urls import reverse
 from django.http import HttpResponse
 from django.conf import settings
+from django.db import transaction
 from hijack.contrib.admin import HijackUserAdminMixin
+from .caching import marketplace_cache
+from .facets import facet_index
 from .views import QuoteRequestView
 
 
+def update_vehicles(queryset, **fields):
+    """
+    Bulk-update vehicles, doing by hand what Vehicle's save signals would:
+    queryset.update() fires none and skips auto_now, so stamp updated_at
+    (drives detail caching, ETags and delta exports), bump the marketplace
+    cache scopes of every affected vehicle and patch the facet index.
+    """
+    scopes = set()
+    vehicle_ids = []
+    for vehicle in queryset.only('id', 'make', 'body_type'):
+        scopes.update(marketplace_cache.scopes_for_vehicle(vehicle))
+        vehicle_ids.append(vehicle.pk)
+    updated = queryset.update(updated_at=timezone.now(), **fields)
+
+    def after_commit():
+        marketplace_cache.bump(*scopes)
+        facet_index.refresh_vehicles(vehicle_ids)
+
+    transaction.on_commit(after_commit)
+    return updated
+
+
 # Custom User Admin with Impersonation
 class UserProfileInline(admin.StackedInline):
     model = Profile
@@ -66,7 +91,7 @@ class VehicleImageInline(admin.TabularInline):
     model = VehicleImage
     extra = 1
     readonly_fields = ('image_preview',)
-    fields = ('image', 'image_preview')
+    fields = ('image', 'position', 'image_preview')
 
     def image_preview(self, obj):
         if obj.image:
@@ -124,7 +149,8 @@ class AdminVehicleOverview(admin.ModelAdmin):
 
     @admin.action(description="Approve selected vehicles (Digital)")
     def approve_digital(self, request, queryset):
-        updated = queryset.update(
+        updated = update_vehicles(
+            queryset,
             verification_state='digital',
             is_digitally_verified=True,
             digitally_verified_by=request.user,
@@ -136,7 +162,8 @@ class AdminVehicleOverview(admin.ModelAdmin):
 
     @admin.action(description="Approve selected vehicles (Physical)")
     def approve_physical(self, request, queryset):
-        updated = queryset.update(
+        updated = update_vehicles(
+            queryset,
             verification_state='physical',
             is_physically_verified=True,
             physically_verified_by=request.user,
@@ -148,7 +175,8 @@ class AdminVehicleOverview(admin.ModelAdmin):
 
     @admin.action(description="Reject selected vehicles")
     def reject_vehicles(self, request, queryset):
-        updated = queryset.update(
+        updated = update_vehicles(
+            queryset,
             verification_state='rejected',
             is_rejected=True,
             rejected_at=timezone.now(),
@@ -362,6 +390,15 @@ class ExportLogAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
 
 
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'data_type', 'export_type', 'status', 'progress', 'record_count', 'created_at']
+    list_filter = ['status', 'data_type', 'export_type', 'created_at']
+    search_fields = ['user__username']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'ip_address']
+    date_hierarchy = 'created_at'
+
+
 @admin.register(Inquiry)
 class InquiryAdmin(admin.ModelAdmin):
     list_display = ['id', 'type', 'name', 'email', 'status_badge', 'assigned_to', 'created_at']
@@ -0,0 +1,4 @@
+# core/analytics/__init__.py
+"""
+Traffic analytics: buffered view tracking and the jobs that persist it.
+"""
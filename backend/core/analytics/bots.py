@@ -0,0 +1,113 @@
+# core/analytics/bots.py
+"""
+Classify view-tracking requests before they reach the view buffer.
+
+Crawlers fetch every vehicle page, so without filtering they dominate both
+the VehicleView write volume and the counts shown to sellers. Each request
+gets one verdict, cheapest check first:
+
+- ``bot``: empty user agent or one matching a known crawler/tool pattern;
+  dropped.
+- ``rate_limited``: the IP recorded more than ``IP_RATE_LIMIT`` views in
+  the current minute; dropped. Real visitors don't open vehicles that fast.
+- ``suspect``: no cookies and no Accept-Language, which browsers always
+  send but most scripts don't; only ``SUSPECT_SAMPLE_RATE`` of these are
+  kept. Cookies alone aren't enough since the SPA calls the API
+  cross-origin without credentials.
+- ``human``: recorded.
+
+Verdict counts go to cache counters, read by ``TrafficFilter.stats`` to
+show how much ingestion load is being shed.
+"""
+import random
+import re
+
+from django.core.cache import cache
+
+from ..caching import _incr
+
+BOT_USER_AGENT_RE = re.compile(
+    r'bot|crawl|spider|slurp|archiver|facebookexternalhit|embedly|preview|'
+    r'headless|phantomjs|selenium|puppeteer|playwright|lighthouse|pingdom|uptime|monitor|'
+    r'curl|wget|python-requests|python-urllib|aiohttp|httpx|go-http-client|java/|okhttp|'
+    r'libwww|scrapy|httpclient|postman|insomnia',
+    re.IGNORECASE,
+)
+# Views per IP per minute above which the rest of the minute is dropped
+IP_RATE_LIMIT = 30
+SUSPECT_SAMPLE_RATE = 0.1
+
+VERDICTS = ('human', 'suspect', 'bot', 'rate_limited')
+
+
+class TrafficFilter:
+    """Decide whether a request's view should be recorded, and count why not."""
+
+    def __init__(self, namespace='analytics:traffic'):
+        self.namespace = namespace
+
+    def _stats_key(self, name):
+        return f"{self.namespace}:stats:{name}"
+
+    def _over_rate(self, ip_address):
+        if not ip_address:
+            return False
+        key = f"{self.namespace}:rate:{ip_address}"
+        added = cache.add(key, 1, timeout=60)
+        if added or added is None:
+            # First view this minute, or the cache is down (IGNORE_EXCEPTIONS
+            # returns None): don't drop real traffic over a missing counter
+            return False
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # Window expired between add and incr
+            return False
+        return count is not None and count > IP_RATE_LIMIT
+
+    def classify(self, request, ip_address=None):
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        if not user_agent.strip() or BOT_USER_AGENT_RE.search(user_agent):
+            return 'bot'
+        if self._over_rate(ip_address):
+            return 'rate_limited'
+        if not request.COOKIES and not request.META.get('HTTP_ACCEPT_LANGUAGE'):
+            return 'suspect'
+        return 'human'
+
+    def should_record(self, request, ip_address=None):
+        """True if a view from this request should be recorded."""
+        if request.user.is_authenticated:
+            # Logged-in users are never crawlers; skip the checks
+            verdict, keep = 'human', True
+        else:
+            verdict = self.classify(request, ip_address)
+            if verdict == 'human':
+                keep = True
+            elif verdict == 'suspect':
+                keep = random.random() < SUSPECT_SAMPLE_RATE
+            else:
+                keep = False
+        _incr(self._stats_key(verdict))
+        if not keep:
+            _incr(self._stats_key('dropped'))
+        return keep
+
+    def stats(self):
+        """Verdict counters since the last reset, with the share of requests shed."""
+        names = VERDICTS + ('dropped',)
+        keys = {name: self._stats_key(name) for name in names}
+        counters = cache.get_many(list(keys.values()))
+        result = {name: counters.get(key, 0) for name, key in keys.items()}
+        total = sum(result[name] for name in VERDICTS)
+        return {
+            **result,
+            'total': total,
+            'shed_rate': round(result['dropped'] / total, 4) if total else None,
+        }
+
+    def reset_stats(self):
+        cache.delete_many([self._stats_key(name) for name in VERDICTS + ('dropped',)])
+
+
+traffic_filter = TrafficFilter()
@@ -0,0 +1,133 @@
+# core/analytics/counters.py
+"""
+Live admin dashboard counters, kept in a Redis hash and pushed over the
+``admin_dashboard`` WebSocket group.
+
+The hash is seeded from the dashboard snapshot (core.analytics.dashboard)
+and then moved by model signals and recorded views through atomic HINCRBYs,
+so a connected dashboard never triggers a recount. Each change schedules at
+most one ``push_dashboard_counters`` task per ``DASHBOARD_PUSH_INTERVAL_MS``;
+that task sends the coalesced values to every connected admin in one
+message.
+
+The hash expires after ``RESEED_SECONDS`` and is then re-seeded from the
+database. That corrects drift from changes no signal sees (bulk updates,
+users toggled active, the 30-day traffic window moving on).
+
+Without Redis, counters are not kept and the consumer reads the cached
+snapshot instead.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ..caching import get_redis
+
+logger = logging.getLogger(__name__)
+
+RESEED_SECONDS = 10 * 60
+
+# HINCRBY the given fields only if the hash is seeded; a missing hash is
+# rebuilt from the database on the next read, which already includes them
+_INCREMENT_IF_SEEDED = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+
+class DashboardCounters:
+    """Signal-maintained dashboard figures with coalesced WebSocket pushes."""
+
+    def __init__(self, key='analytics:dashboard:counters'):
+        self.key = key
+        self._script = None
+
+    @property
+    def push_interval(self):
+        return settings.DASHBOARD_PUSH_INTERVAL_MS / 1000
+
+    def _increment_script(self, client):
+        if self._script is None:
+            self._script = client.register_script(_INCREMENT_IF_SEEDED)
+        return self._script
+
+    def seed(self, client):
+        from .dashboard import compute_dashboard_stats, dashboard_summary
+
+        values = dashboard_summary(compute_dashboard_stats())
+        values.pop('generated_at')
+        pipe = client.pipeline(transaction=True)
+        pipe.delete(self.key)
+        pipe.hset(self.key, mapping=values)
+        pipe.expire(self.key, RESEED_SECONDS)
+        pipe.execute()
+        return values
+
+    def snapshot(self):
+        """Current counter values, seeding them first if needed; None without Redis."""
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            raw = client.hgetall(self.key)
+            if not raw:
+                return self.seed(client)
+            return {field.decode(): int(value) for field, value in raw.items()}
+        except Exception as e:
+            logger.warning(f"Could not read dashboard counters: {e}")
+            return None
+
+    def apply(self, deltas):
+        """Atomically add deltas ({field: n}) and schedule a push."""
+        deltas = {field: n for field, n in deltas.items() if n}
+        client = get_redis()
+        if client is None or not deltas:
+            return
+        args = [part for field, n in deltas.items() for part in (field, n)]
+        try:
+            if self._increment_script(client)(keys=[self.key], args=args):
+                self.schedule_push()
+        except Exception as e:
+            logger.warning(f"Could not update dashboard counters {deltas}: {e}")
+
+    def schedule_push(self):
+        """Queue one push for the current interval; later changes ride along."""
+        pending_key = f"{self.key}:push_pending"
+        if not cache.add(pending_key, 1, timeout=max(self.push_interval * 10, 5)):
+            return
+        try:
+            from ..tasks import push_dashboard_counters
+            push_dashboard_counters.apply_async(countdown=self.push_interval)
+        except Exception as e:
+            cache.delete(pending_key)
+            logger.warning(f"Could not schedule dashboard counter push: {e}")
+
+    def push(self):
+        """Send the current values to the admin_dashboard group."""
+        cache.delete(f"{self.key}:push_pending")
+        values = self.snapshot()
+        if values is None:
+            return None
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return None
+        async_to_sync(channel_layer.group_send)(
+            "admin_dashboard",
+            {
+                'type': 'dashboard_update',
+                'stats': values,
+            }
+        )
+        return values
+
+
+dashboard_counters = DashboardCounters()
@@ -0,0 +1,126 @@
+# core/analytics/dashboard.py
+"""
+Admin dashboard statistics, shared by DashboardStatsView and
+DashboardStatsConsumer.
+
+``compute_dashboard_stats`` issues one conditional-aggregation query per
+table (vehicles, bids, users) plus the traffic figures from the daily
+rollups, instead of a separate COUNT per figure. ``dashboard_stats`` serves
+that snapshot from ``dashboard_cache`` for a few seconds, so every admin
+tab and socket hitting the dashboard at once shares a single computation.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from ..caching import dashboard_cache
+
+
+def _vehicle_stats(seven_days_ago):
+    from ..models import Vehicle
+
+    states = [state for state, _ in Vehicle.VERIFICATION_STATES]
+    counts = Vehicle.objects.aggregate(
+        total=Count('id'),
+        marketplace=Count('id', filter=Q(listing_type='marketplace')),
+        instant_sale=Count('id', filter=Q(listing_type='instant_sale')),
+        new_this_week=Count('id', filter=Q(created_at__gte=seven_days_ago)),
+        **{f"state_{state}": Count('id', filter=Q(verification_state=state)) for state in states},
+    )
+    by_state = {state: counts.pop(f"state_{state}") for state in states}
+    return {
+        'total': counts['total'],
+        'pending': by_state['pending'],
+        'verified': by_state['physical'],
+        'rejected': by_state['rejected'],
+        'marketplace': counts['marketplace'],
+        'instant_sale': counts['instant_sale'],
+        'new_this_week': counts['new_this_week'],
+        'by_state': [
+            {'verification_state': state, 'count': count}
+            for state, count in by_state.items() if count
+        ],
+    }
+
+
+def _bid_stats(seven_days_ago):
+    from ..models import Bid
+
+    counts = Bid.objects.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        accepted=Count('id', filter=Q(status='accepted')),
+        total_value=Sum('amount'),
+        new_this_week=Count('id', filter=Q(created_at__gte=seven_days_ago)),
+    )
+    counts['total_value'] = counts['total_value'] or 0
+    return counts
+
+
+def _user_stats(thirty_days_ago, seven_days_ago):
+    return get_user_model().objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        new_this_month=Count('id', filter=Q(date_joined__gte=thirty_days_ago)),
+        new_this_week=Count('id', filter=Q(date_joined__gte=seven_days_ago)),
+    )
+
+
+def _traffic_stats(since):
+    from ..models import PathVisitDaily, VehicleViewDaily
+
+    views = VehicleViewDaily.objects.filter(date__gte=since)
+    top_vehicles = views.values(
+        'vehicle__id',
+        'vehicle__make',
+        'vehicle__model',
+        'vehicle__year'
+    ).annotate(
+        view_count=Sum('views')
+    ).order_by('-view_count')[:5]
+    return {
+        'marketplace_visits': PathVisitDaily.objects.filter(
+            date__gte=since, path__contains="/marketplace"
+        ).aggregate(total=Sum('visits'))['total'] or 0,
+        'vehicle_views': views.aggregate(total=Sum('views'))['total'] or 0,
+        'top_vehicles': list(top_vehicles),
+    }
+
+
+def compute_dashboard_stats():
+    """Fresh dashboard snapshot, in the DashboardStatsView response shape."""
+    now = timezone.now()
+    thirty_days_ago = now - timedelta(days=30)
+    seven_days_ago = now - timedelta(days=7)
+    return {
+        'vehicles': _vehicle_stats(seven_days_ago),
+        'bids': _bid_stats(seven_days_ago),
+        'users': _user_stats(thirty_days_ago, seven_days_ago),
+        'traffic': _traffic_stats(timezone.localdate(thirty_days_ago)),
+        'generated_at': now.isoformat(),
+    }
+
+
+def dashboard_stats():
+    """Cached dashboard snapshot, recomputed at most once per dashboard_cache.timeout."""
+    key = dashboard_cache.make_key('all', {})
+    return dashboard_cache.get_or_compute(key, compute_dashboard_stats)
+
+
+def dashboard_summary(stats):
+    """Flat subset of a snapshot, as sent over the dashboard WebSocket."""
+    return {
+        'total_vehicles': stats['vehicles']['total'],
+        'pending_vehicles': stats['vehicles']['pending'],
+        'verified_vehicles': stats['vehicles']['verified'],
+        'rejected_vehicles': stats['vehicles']['rejected'],
+        'total_bids': stats['bids']['total'],
+        'pending_bids': stats['bids']['pending'],
+        'total_users': stats['users']['total'],
+        'active_users': stats['users']['active'],
+        'marketplace_visits': stats['traffic']['marketplace_visits'],
+        'vehicle_views': stats['traffic']['vehicle_views'],
+        'generated_at': stats['generated_at'],
+    }
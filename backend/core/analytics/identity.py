@@ -0,0 +1,54 @@
+# core/analytics/identity.py
+"""
+Sessionless visitor ids for anonymous view tracking.
+
+Deduping views by session key meant creating a django_session row for every
+new visitor (and every crawler). Instead an anonymous visitor is identified
+by a signed ``VISITOR_COOKIE``, or when the browser sends no cookie (the
+SPA calls the API cross-origin without credentials) by a keyed hash of IP,
+user agent and the current day. The hash rotates daily and can't be
+reversed to the IP without the secret key.
+
+A new visitor gets the hash as their cookie value, so requests before and
+after the cookie is set resolve to the same id.
+"""
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.utils import timezone
+
+VISITOR_COOKIE = 'visitor_id'
+VISITOR_COOKIE_SALT = 'core.analytics.visitor'
+VISITOR_COOKIE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def fingerprint(ip_address, user_agent, day=None):
+    """32-char daily hash of ip and user agent, keyed with SECRET_KEY."""
+    day = day or timezone.localdate()
+    message = f"{ip_address}|{user_agent}|{day.isoformat()}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+
+def visitor_id(request, ip_address):
+    """
+    (visitor id, is_new) for an anonymous request. is_new means the
+    id should be sent back with set_visitor_cookie.
+    """
+    signed = request.get_signed_cookie(VISITOR_COOKIE, default=None, salt=VISITOR_COOKIE_SALT)
+    if signed:
+        return signed, False
+    return fingerprint(ip_address, request.META.get('HTTP_USER_AGENT', '')), True
+
+
+def set_visitor_cookie(response, value):
+    response.set_signed_cookie(
+        VISITOR_COOKIE,
+        value,
+        salt=VISITOR_COOKIE_SALT,
+        max_age=VISITOR_COOKIE_MAX_AGE,
+        httponly=True,
+        samesite='Lax',
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+    return response
@@ -0,0 +1,149 @@
+# core/analytics/partitions.py
+"""
+Monthly partition maintenance for the raw analytics event tables.
+
+core_vehicleview and core_websitevisit are range partitioned on
+``timestamp`` (migration 0021), one partition per calendar month
+(UTC) named ``<table>_pYYYY_MM`` plus a ``<table>_default`` catch-all.
+Queries that filter on a timestamp range (the daily rollups, the
+dashboards) only touch the matching months, and expiring old data is a
+partition DROP instead of a bulk DELETE followed by a vacuum.
+
+``manage_partitions`` (run daily by Celery beat, or via the
+``manage_partitions`` command) creates partitions ahead of time and
+detaches, then optionally drops, the ones older than
+``ANALYTICS_RETENTION_MONTHS``. Per-day totals survive in the rollup
+tables (core.analytics.rollups), so dropping raw months loses no reporting.
+
+Everything here is a no-op on databases other than PostgreSQL.
+"""
+import logging
+import re
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ('core_vehicleview', 'core_websitevisit')
+# Months created ahead of the current one, so inserts never hit the default
+MONTHS_AHEAD = 3
+
+_PARTITION_RE = re.compile(r'_p(?P<year>\d{4})_(?P<month>\d{2})$')
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def _bound(month):
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def is_partitioned(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table):
+    """{month: partition name} for the monthly partitions of table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = _PARTITION_RE.search(name)
+        if match:
+            partitions[date(int(match['year']), int(match['month']), 1)] = name
+    return partitions
+
+
+def create_partition(table, month):
+    """
+    Create and attach the partition for month. Rows for that month that
+    landed in the default partition are moved into it first, since Postgres
+    refuses to attach a range the default partition already holds.
+    """
+    qn = connection.ops.quote_name
+    name = partition_name(table, month)
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    default = f"{table}_default"
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(default)} "
+            f"WHERE timestamp >= {lower} AND timestamp < {upper} RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved"
+        )
+        if cursor.rowcount:
+            logger.warning(f"Moved {cursor.rowcount} rows from {default} into {name}")
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM ({lower}) TO ({upper})"
+        )
+    return name
+
+
+def ensure_partitions(table, months_ahead=MONTHS_AHEAD, today=None):
+    """Create any missing partitions from the current month to months_ahead; returns their names."""
+    current = (today or date.today()).replace(day=1)
+    existing = list_partitions(table)
+    created = []
+    for n in range(months_ahead + 1):
+        month = add_months(current, n)
+        if month not in existing:
+            created.append(create_partition(table, month))
+    return created
+
+
+def expire_partitions(table, retention_months, drop=True, today=None):
+    """
+    Detach partitions whose whole month is older than retention_months,
+    and drop them (and expired rows in the default partition) unless drop
+    is False. Returns the partition names.
+    """
+    qn = connection.ops.quote_name
+    cutoff = add_months((today or date.today()).replace(day=1), -retention_months)
+    expired = []
+    for month, name in sorted(list_partitions(table).items()):
+        if add_months(month, 1) > cutoff:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+            if drop:
+                cursor.execute(f"DROP TABLE {qn(name)}")
+        expired.append(name)
+    if drop:
+        # Rows that fell into the default partition expire with the same cutoff
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {qn(table + '_default')} WHERE timestamp < {_bound(cutoff)}")
+    return expired
+
+
+def manage_partitions(months_ahead=MONTHS_AHEAD, retention_months=None, drop=True, today=None):
+    """Create upcoming and expire old partitions on every partitioned analytics table."""
+    if connection.vendor != 'postgresql':
+        return {}
+    if retention_months is None:
+        retention_months = settings.ANALYTICS_RETENTION_MONTHS
+    summary = {}
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(table):
+            logger.warning(f"{table} is not partitioned; skipping partition maintenance")
+            continue
+        created = ensure_partitions(table, months_ahead, today=today)
+        expired = expire_partitions(table, retention_months, drop=drop, today=today) if retention_months else []
+        summary[table] = {'created': created, 'expired': expired}
+    return summary
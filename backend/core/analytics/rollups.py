@@ -0,0 +1,124 @@
+# core/analytics/rollups.py
+"""
+Daily rollups of the raw analytics tables.
+
+VehicleView and WebsiteVisit grow by a row per view/visit, so the analytics
+endpoints used to count and group tens of thousands of rows per request.
+They now read VehicleViewDaily / PathVisitDaily instead, which hold one row
+per (vehicle, day) and (path, day).
+
+``rollup_recent`` runs on Celery beat. Each run recomputes whole days from
+the raw rows (never increments), starting the day before the newest rolled
+up day, so it is idempotent and picks up views the write-behind buffer
+flushed late. ``rollup_range`` rebuilds any span of days, e.g. for a
+backfill after deploying.
+"""
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+UPSERT_BATCH_SIZE = 1000
+# Days before the newest rollup that are recomputed on every run, to catch
+# events that reach the raw tables after their day was first rolled up
+LATE_EVENT_DAYS = 1
+
+
+def day_bounds(start, end):
+    """Aware datetimes covering the dates start..end inclusive."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def rollup_vehicle_views(start, end):
+    """Recompute VehicleViewDaily for start..end; returns the rows written."""
+    from ..models import VehicleView, VehicleViewDaily
+
+    since, until = day_bounds(start, end)
+    # Range on the raw timestamp so the timestamp index is used
+    counts = (
+        VehicleView.objects.filter(timestamp__gte=since, timestamp__lt=until)
+        .annotate(day=TruncDate('timestamp'))
+        .values('vehicle_id', 'day')
+        .annotate(views=Count('id'))
+        .order_by()
+    )
+    rows = [
+        VehicleViewDaily(vehicle_id=row['vehicle_id'], date=row['day'], views=row['views'])
+        for row in counts
+    ]
+    with transaction.atomic():
+        VehicleViewDaily.objects.bulk_create(
+            rows,
+            batch_size=UPSERT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['vehicle', 'date'],
+            update_fields=['views'],
+        )
+    return len(rows)
+
+
+def rollup_path_visits(start, end):
+    """Recompute PathVisitDaily for start..end; returns the rows written."""
+    from ..models import PathVisitDaily, WebsiteVisit
+
+    since, until = day_bounds(start, end)
+    counts = (
+        WebsiteVisit.objects.filter(timestamp__gte=since, timestamp__lt=until)
+        .annotate(day=TruncDate('timestamp'))
+        .values('path', 'day')
+        .annotate(visits=Count('id'))
+        .order_by()
+    )
+    rows = [
+        PathVisitDaily(path=row['path'], date=row['day'], visits=row['visits'])
+        for row in counts
+    ]
+    with transaction.atomic():
+        PathVisitDaily.objects.bulk_create(
+            rows,
+            batch_size=UPSERT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['path', 'date'],
+            update_fields=['visits'],
+        )
+    return len(rows)
+
+
+def rollup_range(start, end):
+    """Rebuild both rollups for start..end inclusive."""
+    return {
+        'vehicle_views': rollup_vehicle_views(start, end),
+        'path_visits': rollup_path_visits(start, end),
+    }
+
+
+def _start_date(rollup_model, raw_model, today):
+    """First day that needs recomputing for one rollup table."""
+    newest = rollup_model.objects.aggregate(newest=Max('date'))['newest']
+    if newest is not None:
+        return min(newest, today) - timedelta(days=LATE_EVENT_DAYS)
+    # Nothing rolled up yet: start from the oldest raw row
+    oldest = raw_model.objects.aggregate(oldest=Min('timestamp'))['oldest']
+    if oldest is None:
+        return today
+    return timezone.localdate(oldest)
+
+
+def rollup_recent():
+    """Recompute the days that can still change; called by Celery beat."""
+    from ..models import PathVisitDaily, VehicleView, VehicleViewDaily, WebsiteVisit
+
+    today = timezone.localdate()
+    return {
+        'vehicle_views': rollup_vehicle_views(_start_date(VehicleViewDaily, VehicleView, today), today),
+        'path_visits': rollup_path_visits(_start_date(PathVisitDaily, WebsiteVisit, today), today),
+    }
@@ -0,0 +1,229 @@
+# core/analytics/tracking.py
+"""
+Write-behind buffer for vehicle view events.
+
+Recording a view used to cost several queries (two dedupe lookups, an
+insert and a counter update) on the busiest endpoint. Now the request path
+only talks to Redis:
+
+1. ``cache.add`` on a per (vehicle, visitor) key with a TTL dedupes repeat
+   views within the window (skipped, not failed, when the cache is down);
+2. the event is appended to a Redis list.
+
+The visitor is also added to the HyperLogLog unique-viewer sketches
+(core.analytics.uniques) before the dedupe.
+
+``ViewBuffer.flush`` (run periodically by Celery beat) drains the list,
+writes VehicleView rows with ``bulk_create`` and applies the per-vehicle
+``view_count`` increments in a single UPDATE.
+
+Without Redis (local development) events go to an in-process buffer that
+flushes itself once it is large or old enough.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from ..caching import get_redis
+from .counters import dashboard_counters
+from .trending import VIEW_WEIGHT, trending_index
+from .uniques import unique_visitors
+
+logger = logging.getLogger(__name__)
+
+# Repeat views by the same visitor within this window count once
+DEDUPE_SECONDS = 30 * 60
+FLUSH_BATCH_SIZE = 1000
+# Upper bound per flush run so one run can't hog a worker indefinitely
+FLUSH_MAX_BATCHES = 50
+# In-process fallback: flush from the request once either limit is hit
+LOCAL_FLUSH_SIZE = 200
+LOCAL_FLUSH_SECONDS = 30
+
+
+def visitor_identity(user_id=None, session_key=None, ip_address=None):
+    """
+    Stable dedupe identity: the user if logged in, else the anonymous
+    visitor id (core.analytics.identity, kept in session_key), else IP.
+    """
+    if user_id:
+        return f"u{user_id}"
+    if session_key:
+        return f"s{session_key}"
+    return f"ip{ip_address}"
+
+
+class ViewBuffer:
+    """Dedupe and buffer vehicle view events until the next flush."""
+
+    def __init__(self, key='analytics:vehicle_views', dedupe_seconds=DEDUPE_SECONDS):
+        self.key = key
+        self.dedupe_seconds = dedupe_seconds
+        self._local = deque()
+        self._local_since = None
+        self._lock = threading.Lock()
+
+    def _seen_key(self, vehicle_id, identity):
+        return f"{self.key}:seen:{vehicle_id}:{identity}"
+
+    def record(self, vehicle_id, session_key='', user_id=None, ip_address=None):
+        """
+        Queue a view unless this visitor already viewed the vehicle recently.
+        Returns True if the view was queued.
+        """
+        identity = visitor_identity(user_id, session_key, ip_address)
+        # Before the dedupe so a visitor returning just after midnight still
+        # counts on the new day; PFADD of a known identity is a no-op
+        unique_visitors.add(vehicle_id, identity)
+        added = cache.add(self._seen_key(vehicle_id, identity), 1, timeout=self.dedupe_seconds)
+        # None means the cache is unavailable: count the view rather than
+        # lose it, at the cost of not deduping during the outage
+        if added is False:
+            return False
+        self.push({
+            'vehicle_id': int(vehicle_id),
+            'session_key': session_key or '',
+            'user_id': user_id,
+            'ip_address': ip_address or '0.0.0.0',
+            'ts': time.time(),
+        })
+        return True
+
+    def push(self, event):
+        client = get_redis()
+        if client is not None:
+            try:
+                client.rpush(self.key, json.dumps(event))
+                return
+            except Exception as e:
+                logger.warning(f"View buffer push to Redis failed, buffering locally: {e}")
+        self._push_local(event)
+
+    def _push_local(self, event):
+        with self._lock:
+            if not self._local:
+                self._local_since = time.time()
+            self._local.append(event)
+            due = (
+                len(self._local) >= LOCAL_FLUSH_SIZE
+                or time.time() - self._local_since >= LOCAL_FLUSH_SECONDS
+            )
+        if due:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Local view buffer flush failed: {e}")
+
+    def _drain(self, limit):
+        """Remove and return up to limit events, oldest first."""
+        events = []
+        with self._lock:
+            while self._local and len(events) < limit:
+                events.append(self._local.popleft())
+        if len(events) >= limit:
+            return events
+
+        client = get_redis()
+        if client is None:
+            return events
+        remaining = limit - len(events)
+        # LRANGE + LTRIM inside MULTI so concurrent flushers never share events
+        pipe = client.pipeline(transaction=True)
+        pipe.lrange(self.key, 0, remaining - 1)
+        pipe.ltrim(self.key, remaining, -1)
+        try:
+            raw, _ = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not drain view events from Redis: {e}")
+            return events
+        events.extend(json.loads(item) for item in raw)
+        return events
+
+    def _requeue(self, events):
+        """Put events back after a failed write so they're retried next flush."""
+        client = get_redis()
+        if client is not None:
+            try:
+                client.lpush(self.key, *[json.dumps(event) for event in reversed(events)])
+                return
+            except Exception as e:
+                logger.warning(f"Could not requeue {len(events)} view events in Redis: {e}")
+        with self._lock:
+            self._local.extendleft(reversed(events))
+
+    def pending(self):
+        """Events waiting for the next flush."""
+        client = get_redis()
+        queued = 0
+        if client is not None:
+            try:
+                queued = client.llen(self.key)
+            except Exception:
+                pass
+        return queued + len(self._local)
+
+    def flush(self, batch_size=FLUSH_BATCH_SIZE, max_batches=FLUSH_MAX_BATCHES):
+        """Persist buffered events; returns the number of VehicleView rows written."""
+        written = 0
+        for _ in range(max_batches):
+            events = self._drain(batch_size)
+            if not events:
+                break
+            try:
+                written += self._write(events)
+            except Exception:
+                self._requeue(events)
+                raise
+        return written
+
+    def _write(self, events):
+        from ..models import User, Vehicle, VehicleView
+
+        # Vehicles deleted since the view was recorded are dropped here
+        # instead of being checked on every request; deleted users become
+        # anonymous views
+        existing = set(
+            Vehicle.objects.filter(pk__in={e['vehicle_id'] for e in events}).values_list('id', flat=True)
+        )
+        users = set(
+            User.objects.filter(pk__in={e['user_id'] for e in events if e['user_id']}).values_list('id', flat=True)
+        )
+        events = [e for e in events if e['vehicle_id'] in existing]
+        rows = [
+            VehicleView(
+                vehicle_id=e['vehicle_id'],
+                session_key=e['session_key'][:40],
+                user_id=e['user_id'] if e['user_id'] in users else None,
+                ip_address=e['ip_address'],
+                timestamp=datetime.fromtimestamp(e['ts'], tz=dt_timezone.utc),
+            )
+            for e in events
+        ]
+        if not rows:
+            return 0
+
+        counts = Counter(row.vehicle_id for row in rows)
+        with transaction.atomic():
+            VehicleView.objects.bulk_create(rows, batch_size=500)
+            # One UPDATE for every vehicle in the batch
+            Vehicle.objects.filter(pk__in=counts).update(
+                view_count=F('view_count') + Case(
+                    *[When(pk=vehicle_id, then=Value(n)) for vehicle_id, n in counts.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+        # One counter and one trending update per batch rather than per view
+        dashboard_counters.apply({'vehicle_views': len(rows)})
+        trending_index.record_many([(e['vehicle_id'], VIEW_WEIGHT, e['ts']) for e in events])
+        return len(rows)
+
+
+view_buffer = ViewBuffer()
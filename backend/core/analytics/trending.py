@@ -0,0 +1,143 @@
+# core/analytics/trending.py
+"""
+Time-decayed "trending now" leaderboard in a Redis sorted set.
+
+Every event adds ``weight * 2 ** ((t - epoch) / half_life)`` to its
+vehicle's score. That is exponential decay with the ages of all existing
+scores folded into a fixed reference point: an event one half-life older
+counts half as much, and nothing ever has to be rescanned to decay. Reading
+the top N is a ZREVRANGE, O(log n + N).
+
+The multiplier grows with time, so ``maintain`` (run by Celery beat)
+periodically rebases: it scales every score back by the elapsed factor and
+moves the epoch to now, in one Lua script. It also trims vehicles whose
+score has decayed to nothing and caps the set size.
+
+Views are fed in batches from the view buffer flush, bids from the Bid
+signal. Without Redis, callers fall back to recent view rollups.
+"""
+import logging
+import time
+
+from django.conf import settings
+
+from ..caching import get_redis
+
+logger = logging.getLogger(__name__)
+
+VIEW_WEIGHT = 1.0
+BID_WEIGHT = 10.0
+# Scores below this (in "events as of now") are dropped on maintenance
+MIN_SCORE = 0.01
+MAX_ENTRIES = 10000
+
+_RECORD = """
+local epoch = tonumber(redis.call('GET', KEYS[2]))
+if not epoch then
+    epoch = tonumber(ARGV[1])
+    redis.call('SET', KEYS[2], ARGV[1])
+end
+local half_life = tonumber(ARGV[2])
+for i = 3, #ARGV, 3 do
+    local boost = tonumber(ARGV[i + 1]) * math.pow(2, (tonumber(ARGV[i + 2]) - epoch) / half_life)
+    redis.call('ZINCRBY', KEYS[1], boost, ARGV[i])
+end
+return epoch
+"""
+
+_REBASE = """
+local epoch = tonumber(redis.call('GET', KEYS[2]))
+if not epoch then
+    -- Scores relative to a lost epoch can't be decayed; start over
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+local factor = math.pow(2, -(tonumber(ARGV[1]) - epoch) / tonumber(ARGV[2]))
+redis.call('ZUNIONSTORE', KEYS[1], 1, KEYS[1], 'WEIGHTS', factor)
+redis.call('SET', KEYS[2], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[3])
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[4]) + 1))
+return redis.call('ZCARD', KEYS[1])
+"""
+
+
+class TrendingIndex:
+    """Exponentially decayed per-vehicle activity scores."""
+
+    def __init__(self, key='analytics:trending'):
+        self.key = key
+        self.epoch_key = f"{key}:epoch"
+        self._scripts = {}
+
+    @property
+    def half_life(self):
+        return settings.TRENDING_HALF_LIFE_HOURS * 60 * 60
+
+    def _script(self, client, name, source):
+        if name not in self._scripts:
+            self._scripts[name] = client.register_script(source)
+        return self._scripts[name]
+
+    def record_many(self, events):
+        """Add (vehicle_id, weight, unix timestamp) events in one round trip."""
+        client = get_redis()
+        if client is None or not events:
+            return
+        args = [time.time(), self.half_life]
+        for vehicle_id, weight, ts in events:
+            args.extend((vehicle_id, weight, ts))
+        try:
+            self._script(client, 'record', _RECORD)(keys=[self.key, self.epoch_key], args=args)
+        except Exception as e:
+            logger.warning(f"Could not update trending scores for {len(events)} events: {e}")
+
+    def record(self, vehicle_id, weight=VIEW_WEIGHT, ts=None):
+        self.record_many([(vehicle_id, weight, ts or time.time())])
+
+    def remove(self, vehicle_id):
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.zrem(self.key, vehicle_id)
+        except Exception as e:
+            logger.warning(f"Could not remove vehicle {vehicle_id} from trending: {e}")
+
+    def top(self, limit):
+        """
+        [(vehicle_id, score)] best first, scores in decayed events as of now;
+        None if Redis is unavailable.
+        """
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            pipe = client.pipeline(transaction=True)
+            pipe.zrevrange(self.key, 0, limit - 1, withscores=True)
+            pipe.get(self.epoch_key)
+            entries, epoch = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not read trending vehicles: {e}")
+            return None
+        if not entries:
+            return []
+        if epoch is None:
+            # Epoch evicted or deleted: the scores can't be decayed, so treat
+            # the leaderboard as empty until maintain() clears it
+            logger.warning("Trending epoch missing, ignoring the leaderboard")
+            return []
+        factor = 2 ** (-(time.time() - float(epoch)) / self.half_life)
+        return [(int(member), round(score * factor, 3)) for member, score in entries]
+
+    def maintain(self):
+        """Rebase scores to now and trim; returns the remaining set size."""
+        client = get_redis()
+        if client is None:
+            return None
+        return self._script(client, 'rebase', _REBASE)(
+            keys=[self.key, self.epoch_key],
+            args=[time.time(), self.half_life, MIN_SCORE, MAX_ENTRIES],
+        )
+
+
+trending_index = TrendingIndex()
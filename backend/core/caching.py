@@ -0,0 +1,245 @@
+# core/caching.py
+"""
+Versioned response caching for public read endpoints.
+
+Cached entries embed a version counter in their key, so invalidating a set
+of pages only means bumping a number instead of hunting down every key.
+Each namespace keeps one counter per scope; the marketplace uses a global
+``all`` scope plus one scope per filter dimension value (``make:toyota``),
+so editing a Toyota leaves cached BMW pages untouched.
+
+``get_or_compute`` adds stale-while-revalidate and single-flight fills on top:
+an expired entry keeps being served while exactly one worker (holding a short
+lease) recomputes it, and concurrent misses for the same key wait for that
+worker instead of all hitting the database.
+
+When the cache is down (IGNORE_EXCEPTIONS turns every call into a None),
+no versioned key can be built and nothing can be leased, so values are
+computed directly instead of waiting on a lease nobody can hold.
+"""
+import hashlib
+import logging
+import time
+import uuid
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+REDIS_AVAILABLE = False
+try:
+    from django_redis import get_redis_connection
+    REDIS_AVAILABLE = True
+except ImportError:
+    logger.warning("django-redis not available, Redis-only features fall back to local state")
+
+
+def get_redis():
+    """Raw Redis client behind the default cache, or None if the cache isn't Redis."""
+    if not REDIS_AVAILABLE:
+        return None
+    try:
+        return get_redis_connection('default')
+    except NotImplementedError:
+        return None
+
+
+def _incr(key, delta=1):
+    """Atomically increment a counter, creating it if it does not exist."""
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Missing key: add() is atomic, so only one caller initialises it
+        if cache.add(key, delta, timeout=None):
+            return delta
+        return cache.incr(key, delta)
+
+
+class VersionedCache:
+    """A cache namespace whose keys are tied to per-scope version counters."""
+
+    def __init__(self, namespace, timeout=300, stale_timeout=0, lock_timeout=10, fill_wait=2.0):
+        self.namespace = namespace
+        self.timeout = timeout
+        # How long an expired entry may still be served while it is refreshed
+        self.stale_timeout = stale_timeout
+        # Lease held by the worker recomputing an entry
+        self.lock_timeout = lock_timeout
+        # How long a concurrent miss waits for that worker before computing itself
+        self.fill_wait = fill_wait
+
+    def _version_key(self, scope):
+        return f"{self.namespace}_cache_version:{scope}"
+
+    def _stats_key(self, name):
+        return f"{self.namespace}_cache_stats:{name}"
+
+    def get_version(self, scope):
+        """Return the current version of a scope, initialising it if needed; None if the cache is down."""
+        key = self._version_key(scope)
+        version = cache.get(key)
+        if version is None:
+            # Seed from the clock rather than 1 so an evicted counter never
+            # restarts at a value that older cached entries were stored under
+            seed = int(time.time() * 1000)
+            added = cache.add(key, seed, timeout=None)
+            if added is None:
+                return None
+            version = seed if added else cache.get(key)
+        return version
+
+    def bump(self, *scopes):
+        """Invalidate every entry cached under the given scopes."""
+        for scope in set(scopes):
+            key = self._version_key(scope)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Nothing has been cached under this scope yet
+                pass
+
+    def make_key(self, scope, params):
+        """Build a versioned key for a scope and a dict of request params; None if the cache is down."""
+        version = self.get_version(scope)
+        if version is None:
+            return None
+        canonical = urlencode(sorted(params.items()))
+        digest = hashlib.md5(canonical.encode()).hexdigest()
+        return f"{self.namespace}:{scope}:v{version}:{digest}"
+
+    def _acquire(self, key):
+        """
+        Take the fill lease for a key: returns a token, None if it's held
+        elsewhere, or False if the cache is down.
+        """
+        token = uuid.uuid4().hex
+        added = cache.add(f"{key}:lock", token, timeout=self.lock_timeout)
+        if added is None:
+            return False
+        return token if added else None
+
+    def _release(self, key, token):
+        lock_key = f"{key}:lock"
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+    def _fill(self, key, compute, timeout):
+        value = compute()
+        entry = {'value': value, 'fresh_until': time.time() + timeout}
+        cache.set(key, entry, timeout=timeout + self.stale_timeout)
+        return value
+
+    def get_or_compute(self, key, compute, timeout=None):
+        """
+        Return the cached value for key, calling compute() to fill it.
+
+        Fresh entries are returned directly. Stale entries are returned while
+        the caller that wins the lease refreshes them. On a full miss only the
+        lease holder runs compute(); everyone else polls for its result.
+        A None key (see make_key) means the cache is down: compute directly.
+        """
+        if key is None:
+            return compute()
+        timeout = timeout or self.timeout
+        entry = cache.get(key)
+
+        if entry is not None:
+            if entry['fresh_until'] > time.time():
+                _incr(self._stats_key('hits'))
+                return entry['value']
+
+            _incr(self._stats_key('stale_hits'))
+            token = self._acquire(key)
+            if not token:
+                return entry['value']
+            try:
+                return self._fill(key, compute, timeout)
+            except Exception as e:
+                logger.warning(f"Refreshing {key} failed, serving stale entry: {e}")
+                return entry['value']
+            finally:
+                self._release(key, token)
+
+        _incr(self._stats_key('misses'))
+        token = self._acquire(key)
+        if token is False:
+            # Nobody can hold a lease, so nobody else is filling this key
+            return compute()
+        if token is not None:
+            try:
+                return self._fill(key, compute, timeout)
+            finally:
+                self._release(key, token)
+
+        # Another worker is filling this key; wait for it instead of piling on
+        deadline = time.time() + self.fill_wait
+        while time.time() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                _incr(self._stats_key('coalesced'))
+                return entry['value']
+
+        # The lease holder is slow or died; don't fail the request over it
+        return compute()
+
+    STAT_NAMES = ('hits', 'stale_hits', 'misses', 'coalesced')
+
+    def stats(self):
+        """Hit/miss counters for this namespace since the last reset."""
+        keys = {name: self._stats_key(name) for name in self.STAT_NAMES}
+        counters = cache.get_many(list(keys.values()))
+        result = {name: counters.get(key, 0) for name, key in keys.items()}
+        served = result['hits'] + result['stale_hits']
+        total = served + result['misses']
+        return {
+            'namespace': self.namespace,
+            **result,
+            'hit_rate': round(served / total, 4) if total else None,
+        }
+
+    def reset_stats(self):
+        cache.delete_many([self._stats_key(name) for name in self.STAT_NAMES])
+
+
+class MarketplaceCache(VersionedCache):
+    """Versioned cache for marketplace listing pages."""
+
+    # Filter dimensions with their own invalidation scope, most selective first
+    DIMENSIONS = ('make', 'body_type')
+
+    @staticmethod
+    def _scope(dimension, value):
+        return f"{dimension}:{str(value).strip().lower()}"
+
+    def scope_for(self, params):
+        """Pick the narrowest scope that contains every result for these params."""
+        for dimension in self.DIMENSIONS:
+            value = params.get(dimension)
+            if value:
+                return self._scope(dimension, value)
+        return 'all'
+
+    def key_for(self, params):
+        return self.make_key(self.scope_for(params), params)
+
+    def scopes_for_vehicle(self, vehicle, previous=None):
+        """Scopes whose pages may contain this vehicle, before or after a change."""
+        scopes = ['all']
+        previous = previous or {}
+        for dimension in self.DIMENSIONS:
+            for value in (getattr(vehicle, dimension, None), previous.get(dimension)):
+                if value:
+                    scopes.append(self._scope(dimension, value))
+        return scopes
+
+    def invalidate_vehicle(self, vehicle, previous=None):
+        self.bump(*self.scopes_for_vehicle(vehicle, previous))
+
+
+marketplace_cache = MarketplaceCache('marketplace', timeout=300, stale_timeout=600)
+# Vehicle detail payloads; keys embed updated_at, so edits never serve stale data
+vehicle_detail_cache = VersionedCache('vehicle_detail', timeout=600)
+# Admin dashboard snapshot (core.analytics.dashboard); short-lived on purpose
+dashboard_cache = VersionedCache('dashboard', timeout=30, stale_timeout=30)
@@ -0,0 +1,74 @@
+# core/conditional.py
+"""
+ETag / Last-Modified functions for Django's ``condition`` decorator.
+
+Each function derives a validator from a cheap change token instead of the
+response body, so a client's If-None-Match / If-Modified-Since is answered
+with 304 before any serializer runs:
+
+- marketplace pages use the versioned cache key, which already changes
+  whenever a vehicle in the page's scope is saved or deleted (no ETag is
+  sent while the cache is unavailable);
+- vehicle detail uses ``Vehicle.updated_at``, which is also touched when
+  the vehicle's images change.
+"""
+import hashlib
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .caching import marketplace_cache
+from .models import Vehicle
+
+# Bump when a serializer's output changes shape, so clients holding an
+# ETag from the previous deploy don't keep the old representation
+REPRESENTATION_VERSION = 1
+
+
+def _strong_etag(*parts):
+    raw = ':'.join(str(part) for part in (REPRESENTATION_VERSION, *parts))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def marketplace_etag(request, *args, **kwargs):
+    key = marketplace_cache.key_for(request.GET.dict())
+    if key is None:
+        # Cache unavailable: without a version there's nothing to validate against
+        return None
+    return _strong_etag('marketplace', key)
+
+
+def vehicle_updated_at(request, kwargs):
+    """updated_at of the requested vehicle, fetched once per request."""
+    if not hasattr(request, '_vehicle_updated_at'):
+        if 'updated_at' in kwargs:
+            # The view already looked it up
+            updated_at = kwargs['updated_at']
+        else:
+            pk = kwargs.get('pk') or kwargs.get('vehicle_id')
+            try:
+                updated_at = Vehicle.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+            except (TypeError, ValueError):
+                updated_at = None
+        request._vehicle_updated_at = updated_at
+    return request._vehicle_updated_at
+
+
+def vehicle_etag(request, *args, **kwargs):
+    updated_at = vehicle_updated_at(request, kwargs)
+    if updated_at is None:
+        # Unknown vehicle: let the view produce its 404
+        return None
+    pk = kwargs.get('pk') or kwargs.get('vehicle_id')
+    return _strong_etag('vehicle', pk, updated_at.isoformat())
+
+
+def vehicle_last_modified(request, *args, **kwargs):
+    return vehicle_updated_at(request, kwargs)
+
+
+# For APIView/ViewSet methods, which receive self before request
+marketplace_conditional = method_decorator(condition(etag_func=marketplace_etag))
+vehicle_conditional = method_decorator(
+    condition(etag_func=vehicle_etag, last_modified_func=vehicle_last_modified)
+)
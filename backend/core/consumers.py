@@ -81,6 +81,13 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'stats': event['stats']
         }))
 
+    async def export_progress(self, event):
+        """Send export job progress to WebSocket."""
+        await self.send(text_data=json.dumps({
+            'type': 'export_progress',
+            'job': event['job']
+        }))
+
     @database_sync_to_async
     def mark_notification_read(self, notification_id):
         """Mark a notification as read."""
@@ -156,32 +163,14 @@ class DashboardStatsConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def get_dashboard_stats(self):
-        """Get current dashboard statistics."""
-        from .models import Vehicle, Bid, VehicleView, WebsiteVisit
-        from django.db.models import Count, Sum
-        from datetime import timedelta
-        from django.utils import timezone
-
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-
-        stats = {
-            'total_vehicles': Vehicle.objects.count(),
-            'pending_vehicles': Vehicle.objects.filter(verification_state='pending').count(),
-            'verified_vehicles': Vehicle.objects.filter(verification_state='physical').count(),
-            'rejected_vehicles': Vehicle.objects.filter(verification_state='rejected').count(),
-            'total_bids': Bid.objects.count(),
-            'pending_bids': Bid.objects.filter(status='pending').count(),
-            'total_users': User.objects.count(),
-            'active_users': User.objects.filter(is_active=True).count(),
-            'marketplace_visits': WebsiteVisit.objects.filter(
-                visited_at__gte=thirty_days_ago
-            ).count(),
-            'vehicle_views': VehicleView.objects.filter(
-                viewed_at__gte=thirty_days_ago
-            ).count(),
-        }
-
-        return stats
+        """Get current dashboard statistics from the live counters."""
+        from .analytics.counters import dashboard_counters
+        from .analytics.dashboard import dashboard_stats, dashboard_summary
+        counters = dashboard_counters.snapshot()
+        if counters is not None:
+            return counters
+        # No Redis: fall back to the cached snapshot DashboardStatsView serves
+        return dashboard_summary(dashboard_stats())
 
 
 # Utility functions for sending notifications
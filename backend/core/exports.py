@@ -1,12 +1,23 @@
 # core/exports.py
 """
-Export service for generating Excel, CSV, and PDF exports.
+Export service for generating Excel, CSV, and PDF exports, plus Parquet
+and Arrow IPC when pyarrow is installed.
 Supports streaming for large datasets.
 """
 import csv
 import io
-from typing import List, Dict, Any, Iterator
-from django.http import StreamingHttpResponse, HttpResponse
+import logging
+import os
+import tempfile
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Callable, Optional
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files import File
+from django.db import models
+from django.db.models.constants import LOOKUP_SEP
+from django.http import FileResponse, StreamingHttpResponse, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
@@ -14,6 +25,143 @@ from reportlab.lib.styles import getSampleStyleSheet
 import xlsxwriter
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Columnar (Parquet / Arrow IPC) exports need pyarrow
+PYARROW_AVAILABLE = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    logger.warning("pyarrow package not installed, Parquet and Arrow exports will be disabled")
+
+# Rows between progress callbacks while writing an export
+PROGRESS_EVERY = 500
+
+# Rows fetched per round trip, and formatted per batch, when writing exports
+CHUNK_SIZE = 2000
+
+# Streamed exports stay in memory up to this size, then spill to disk
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+
+
+def _format_value(value):
+    """Format one cell the way exports always have."""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M')
+    elif value is None:
+        return 'N/A'
+    elif isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    return value
+
+
+def _format_datetime(value):
+    return 'N/A' if value is None else value.strftime('%Y-%m-%d %H:%M')
+
+
+def _format_bool(value):
+    return 'N/A' if value is None else ('Yes' if value else 'No')
+
+
+def _format_nullable(value):
+    return 'N/A' if value is None else value
+
+
+def _field_path(model, column):
+    """Model fields along an export column, or None if it isn't a plain field path."""
+    fields = []
+    for part in column.split(LOOKUP_SEP):
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if field.many_to_many or field.one_to_many:
+            return None
+        fields.append(field)
+        model = field.related_model if field.is_relation else None
+    # A bare relation would export the related object's str(), not its key
+    if fields[-1].is_relation:
+        return None
+    return fields
+
+
+def _column_formatter(fields):
+    """Formatter for a column's values, chosen once from its field type."""
+    field = fields[-1]
+    if isinstance(field, models.DateTimeField):
+        return _format_datetime
+    if isinstance(field, models.BooleanField):
+        return _format_bool
+    # Columns through a nullable relation come back None when it's unset
+    if any(f.null for f in fields):
+        return _format_nullable
+    return None
+
+
+def _arrow_type(column, fields):
+    """Arrow type for an export column from its model field; text if it isn't a field path."""
+    if not fields:
+        return pa.string()
+    field = fields[-1]
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, models.IntegerField):
+        return pa.int64()
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    # DateTimeField subclasses DateField, so it goes first
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    if isinstance(field, models.CharField) and (field.choices or column in ExportService.DICTIONARY_COLUMNS):
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+
+class _DictionaryEncoder:
+    """
+    Dictionary-encodes one column across record batches. The dictionary
+    only ever grows, so each batch's is an extension of the last one: the
+    Arrow IPC file format accepts that as a delta, where an unrelated
+    dictionary per batch would be rejected.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def encode(self, values):
+        indices = []
+        for value in values:
+            if value is not None:
+                position = self.index.get(value)
+                if position is None:
+                    position = self.index[value] = len(self.values)
+                    self.values.append(value)
+                value = position
+            indices.append(value)
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()), pa.array(self.values, type=pa.string())
+        )
+
+
+def _attribute_accessor(column):
+    """Compiled getattr chain for a column that isn't a plain field path."""
+    parts = column.split(LOOKUP_SEP)
+
+    def get(item):
+        for part in parts:
+            item = getattr(item, part, None) if item else None
+        return item
+    return get
+
 
 class ExportService:
     """Service class for generating exports."""
@@ -60,6 +208,43 @@ class ExportService:
         'date_joined': 'Joined At',
     }
 
+    # Query params each data type can be filtered on
+    FILTERS = {
+        'vehicles': ('verification_state', 'listing_type'),
+        'bids': ('status',),
+        'users': (),
+    }
+
+    FILE_EXTENSIONS = {
+        'csv': 'csv',
+        'excel': 'xlsx',
+        'pdf': 'pdf',
+        'parquet': 'parquet',
+        'arrow': 'arrow',
+    }
+
+    # Typed, column-oriented formats written from raw values (need pyarrow)
+    COLUMNAR_TYPES = {
+        'parquet': 'application/vnd.apache.parquet',
+        'arrow': 'application/vnd.apache.arrow.file',
+    }
+
+    # Repetitive text columns stored dictionary-encoded in columnar exports;
+    # fields with choices always are
+    DICTIONARY_COLUMNS = {'make', 'model', 'location', 'vehicle__make', 'vehicle__model'}
+
+    TITLES = {
+        'vehicles': 'Vehicle Export',
+        'bids': 'Bids Export',
+        'users': 'Users Export',
+    }
+
+    # Data types that support delta exports, with the field bumped on every change
+    DELTA_FIELDS = {
+        'vehicles': 'updated_at',
+        'bids': 'updated_at',
+    }
+
     @staticmethod
     def get_columns(data_type: str) -> Dict[str, str]:
         """Get column definitions for a data type."""
@@ -71,33 +256,164 @@ class ExportService:
         return columns_map.get(data_type, ExportService.VEHICLE_COLUMNS)
 
     @staticmethod
-    def prepare_row(item: Any, columns: List[str]) -> List[Any]:
-        """Prepare a single row for export."""
-        row = []
-        for col in columns:
-            if '__' in col:
-                # Handle nested attributes
-                parts = col.split('__')
-                value = item
-                for part in parts:
-                    value = getattr(value, part, None) if value else None
-            else:
-                value = getattr(item, col, None)
-
-            # Format special values
-            if isinstance(value, datetime):
-                value = value.strftime('%Y-%m-%d %H:%M')
-            elif value is None:
-                value = 'N/A'
-            elif isinstance(value, bool):
-                value = 'Yes' if value else 'No'
-
-            row.append(value)
-        return row
-
-    @staticmethod
-    def generate_csv_stream(queryset, columns: List[str], column_headers: List[str]) -> Iterator[str]:
-        """Generate CSV content as a stream."""
+    def resolve_columns(data_type: str, user=None, config_id=None) -> List[str]:
+        """Columns from the user's saved configuration, or every column."""
+        from .models import ExportConfiguration
+        available = ExportService.get_columns(data_type)
+        if config_id and user is not None:
+            try:
+                config = ExportConfiguration.objects.get(id=config_id, user=user)
+                return config.columns
+            except (ExportConfiguration.DoesNotExist, ValueError):
+                pass
+        return list(available.keys())
+
+    @staticmethod
+    def get_headers(data_type: str, columns: List[str]) -> List[str]:
+        available = ExportService.get_columns(data_type)
+        return [available.get(col, col) for col in columns]
+
+    @staticmethod
+    def build_queryset(data_type: str, filters: dict):
+        """Queryset for a data type with the supported filters applied."""
+        from .models import Bid, User, Vehicle
+        if data_type == 'bids':
+            queryset = Bid.objects.select_related('vehicle', 'bidder').order_by('-created_at')
+        elif data_type == 'users':
+            queryset = User.objects.order_by('-date_joined')
+        else:
+            queryset = Vehicle.objects.select_related('owner').order_by('-created_at')
+
+        for field in ExportService.FILTERS.get(data_type, ()):
+            value = (filters or {}).get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset
+
+    @staticmethod
+    def resolve_since_export(data_type: str, since_export, user) -> int:
+        """
+        Id of the export a delta export runs from; 'latest' means the user's
+        most recent export of this data type. Raises ValueError if there is
+        no such export.
+        """
+        from .models import ExportLog
+        if data_type not in ExportService.DELTA_FIELDS:
+            raise ValueError(f"Delta exports are not supported for {data_type}")
+        logs = ExportLog.objects.filter(data_type=data_type)
+        if since_export == 'latest':
+            log = logs.filter(user=user).order_by('-created_at').first()
+        else:
+            try:
+                log = logs.filter(pk=int(since_export)).first()
+            except (TypeError, ValueError):
+                log = None
+        if log is None:
+            raise ValueError(f"No {data_type} export found for since_export={since_export}")
+        return log.id
+
+    @staticmethod
+    def is_available(export_type: str) -> bool:
+        return export_type not in ExportService.COLUMNAR_TYPES or PYARROW_AVAILABLE
+
+    @staticmethod
+    def arrow_schema(model, columns: List[str], delta: bool = False):
+        """Arrow schema for exporting columns of a model; delta exports lead with a 'change' column."""
+        schema = [pa.field(col, _arrow_type(col, _field_path(model, col))) for col in columns]
+        if delta:
+            schema.insert(0, pa.field('change', pa.dictionary(pa.int32(), pa.string()), nullable=False))
+        return pa.schema(schema)
+
+    @staticmethod
+    def prepare_export(data_type: str, columns: List[str], filters: dict, columnar: bool = False):
+        """
+        (rows, headers, record count) for an export. Columnar exports get
+        raw values with None for missing ones, and an Arrow schema in place
+        of the headers.
+
+        If filters carry a ``since_export`` log id this is a delta export:
+        only rows created or changed since that export's watermark, each
+        marked 'changed', followed by a 'deleted' row (just the id) for each
+        tombstone recorded since. The id column is always included so the
+        rows can be applied to an earlier copy.
+        """
+        from .models import ExportLog, ExportTombstone
+        filters = filters or {}
+        queryset = ExportService.build_queryset(data_type, filters)
+        since_export = filters.get('since_export')
+        if not since_export:
+            rows = ExportService.iter_rows(queryset, columns, formatted=not columnar)
+            if columnar:
+                return rows, ExportService.arrow_schema(queryset.model, columns), queryset.count()
+            return rows, ExportService.get_headers(data_type, columns), queryset.count()
+
+        log = ExportLog.objects.get(pk=since_export)
+        since = log.watermark or log.created_at
+        if 'id' not in columns:
+            columns = ['id', *columns]
+        changed = queryset.filter(**{f"{ExportService.DELTA_FIELDS[data_type]}__gte": since})
+        deleted = ExportTombstone.objects.filter(
+            data_type=data_type, deleted_at__gte=since
+        ).order_by('deleted_at').values_list('object_id', flat=True)
+
+        missing = None if columnar else 'N/A'
+
+        def rows():
+            for row in ExportService.iter_rows(changed, columns, formatted=not columnar):
+                yield ['changed', *row]
+            id_index = columns.index('id')
+            for object_id in deleted.iterator(chunk_size=CHUNK_SIZE):
+                row = [missing] * len(columns)
+                row[id_index] = object_id
+                yield ['deleted', *row]
+
+        if columnar:
+            headers = ExportService.arrow_schema(queryset.model, columns, delta=True)
+        else:
+            headers = ['Change', *ExportService.get_headers(data_type, columns)]
+        return rows(), headers, changed.count() + deleted.count()
+
+    @staticmethod
+    def iter_rows(queryset, columns: List[str], chunk_size: int = CHUNK_SIZE,
+                  formatted: bool = True) -> Iterator[List[Any]]:
+        """
+        Export rows for a queryset, each cell formatted as _format_value
+        does, or the raw values if not ``formatted``.
+
+        The column list is compiled once. When every column is a field path
+        the rows come from a values_list() projection, so no model instances
+        are built, and each chunk is formatted a column at a time with a
+        formatter picked from the field type. Otherwise rows are read from
+        instances through precompiled accessors.
+        """
+        paths = [_field_path(queryset.model, col) for col in columns]
+
+        if all(paths):
+            formatters = [_column_formatter(fields) if formatted else None for fields in paths]
+            formatted = [i for i, formatter in enumerate(formatters) if formatter]
+            rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    return
+                if not formatted:
+                    yield from (list(row) for row in chunk)
+                    continue
+                values = [list(col) for col in zip(*chunk)]
+                for i in formatted:
+                    values[i] = list(map(formatters[i], values[i]))
+                yield from (list(row) for row in zip(*values))
+        else:
+            accessors = [_attribute_accessor(col) for col in columns]
+            for item in queryset.iterator(chunk_size=chunk_size):
+                if formatted:
+                    yield [_format_value(get(item)) for get in accessors]
+                else:
+                    yield [get(item) for get in accessors]
+
+    @staticmethod
+    def stream_csv(rows: Iterable[List[Any]], column_headers: List[str]) -> Iterator[str]:
+        """Generate CSV content for formatted rows as a stream."""
         # Yield headers
         output = io.StringIO()
         writer = csv.writer(output)
@@ -108,8 +424,7 @@ class ExportService:
 
         # Yield data rows in batches
         batch_size = 1000
-        for i, item in enumerate(queryset.iterator()):
-            row = ExportService.prepare_row(item, columns)
+        for i, row in enumerate(rows):
             writer.writerow(row)
 
             if (i + 1) % batch_size == 0:
@@ -121,20 +436,41 @@ class ExportService:
         yield output.getvalue()
 
     @staticmethod
-    def export_to_csv(queryset, columns: List[str], column_headers: List[str], filename: str) -> StreamingHttpResponse:
-        """Export data to CSV with streaming."""
+    def write_csv(output, rows: Iterable[List[Any]], column_headers: List[str],
+                  progress: Optional[Callable[[int], None]] = None) -> int:
+        """Write CSV to a binary file object; returns the number of rows."""
+        text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+        try:
+            writer = csv.writer(text)
+            writer.writerow(column_headers)
+            count = 0
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+                if progress and count % PROGRESS_EVERY == 0:
+                    progress(count)
+            text.flush()
+        finally:
+            # Leave the underlying file open for the caller
+            text.detach()
+        return count
+
+    @staticmethod
+    def csv_response(rows: Iterable[List[Any]], column_headers: List[str], filename: str) -> StreamingHttpResponse:
         response = StreamingHttpResponse(
-            ExportService.generate_csv_stream(queryset, columns, column_headers),
+            ExportService.stream_csv(rows, column_headers),
             content_type='text/csv'
         )
         response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
         return response
 
     @staticmethod
-    def export_to_excel(queryset, columns: List[str], column_headers: List[str], filename: str) -> HttpResponse:
-        """Export data to Excel."""
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    def write_excel(output, rows: Iterable[List[Any]], column_headers: List[str],
+                    progress: Optional[Callable[[int], None]] = None) -> int:
+        """Write an Excel workbook to a binary file object; returns the number of rows."""
+        # constant_memory flushes each row to a temp file as soon as the next
+        # one starts, so rows must be written in order and never revisited
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
         worksheet = workbook.add_worksheet('Data')
 
         # Add header formatting
@@ -149,36 +485,46 @@ class ExportService:
             'border': 1,
         })
 
-        # Write headers
+        # Adjust column widths
         for col_num, header in enumerate(column_headers):
-            worksheet.write(0, col_num, header, header_format)
+            worksheet.set_column(col_num, col_num, max(len(header) + 2, 15))
+
+        # Write headers
+        worksheet.write_row(0, 0, column_headers, header_format)
 
         # Write data rows
         row_num = 1
-        for item in queryset.iterator():
-            row = ExportService.prepare_row(item, columns)
-            for col_num, value in enumerate(row):
-                worksheet.write(row_num, col_num, str(value), cell_format)
+        for row in rows:
+            worksheet.write_row(row_num, 0, [str(value) for value in row], cell_format)
+            if progress and row_num % PROGRESS_EVERY == 0:
+                progress(row_num)
             row_num += 1
 
-        # Adjust column widths
-        for col_num, header in enumerate(column_headers):
-            worksheet.set_column(col_num, col_num, max(len(header) + 2, 15))
-
         workbook.close()
+        return row_num - 1
+
+    @staticmethod
+    def excel_response(rows: Iterable[List[Any]], column_headers: List[str], filename: str) -> FileResponse:
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        try:
+            ExportService.write_excel(output, rows, column_headers)
+        except Exception:
+            output.close()
+            raise
         output.seek(0)
 
-        response = HttpResponse(
-            output.read(),
+        # FileResponse streams the file in blocks and closes it when done
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f"{filename}.xlsx",
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-        response['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
-        return response
 
     @staticmethod
-    def export_to_pdf(queryset, columns: List[str], column_headers: List[str], filename: str, title: str = "Export") -> HttpResponse:
-        """Export data to PDF."""
-        output = io.BytesIO()
+    def write_pdf(output, rows: Iterable[List[Any]], column_headers: List[str], title: str = "Export",
+                  progress: Optional[Callable[[int], None]] = None) -> int:
+        """Write a PDF table to a binary file object; returns the number of rows."""
         doc = SimpleDocTemplate(output, pagesize=landscape(letter))
         elements = []
         styles = getSampleStyleSheet()
@@ -189,9 +535,10 @@ class ExportService:
 
         # Prepare table data
         table_data = [column_headers]
-        for item in queryset.iterator():
-            row = ExportService.prepare_row(item, columns)
+        for row in rows:
             table_data.append([str(v)[:50] for v in row])  # Truncate long values
+            if progress and (len(table_data) - 1) % PROGRESS_EVERY == 0:
+                progress(len(table_data) - 1)
 
         # Create table
         table = Table(table_data, repeatRows=1)
@@ -215,6 +562,101 @@ class ExportService:
 
         # Build PDF
         doc.build(elements)
+        return len(table_data) - 1
+
+    @staticmethod
+    def write_columnar(export_type: str, output, rows: Iterable[List[Any]], schema,
+                       progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Write raw rows as Parquet or an Arrow IPC file, one record batch per
+        CHUNK_SIZE rows; returns the number of rows.
+        """
+        encoders = {
+            i: _DictionaryEncoder() for i, field in enumerate(schema)
+            if pa.types.is_dictionary(field.type)
+        }
+        text = {i for i, field in enumerate(schema) if pa.types.is_string(field.type)}
+        if export_type == 'parquet':
+            writer = pq.ParquetWriter(output, schema, compression='zstd')
+        else:
+            writer = pa.ipc.new_file(
+                output, schema,
+                options=pa.ipc.IpcWriteOptions(compression='zstd', emit_dictionary_deltas=True),
+            )
+
+        rows = iter(rows)
+        count = 0
+        try:
+            while True:
+                chunk = list(islice(rows, CHUNK_SIZE))
+                if not chunk:
+                    break
+                arrays = []
+                for i, (field, values) in enumerate(zip(schema, zip(*chunk))):
+                    if i in encoders:
+                        arrays.append(encoders[i].encode(values))
+                        continue
+                    if i in text:
+                        # Columns that aren't model fields can hold anything
+                        values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+                    arrays.append(pa.array(values, type=field.type))
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                count += len(chunk)
+                if progress:
+                    progress(count)
+        finally:
+            writer.close()
+        return count
+
+    @staticmethod
+    def columnar_response(export_type: str, rows: Iterable[List[Any]], schema, filename: str) -> FileResponse:
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        try:
+            ExportService.write_columnar(export_type, output, rows, schema)
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f"{filename}.{ExportService.FILE_EXTENSIONS[export_type]}",
+            content_type=ExportService.COLUMNAR_TYPES[export_type]
+        )
+
+    @staticmethod
+    def write(export_type: str, output, rows: Iterable[List[Any]], column_headers: List[str],
+              title: str = "Export", progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Write rows as an export of the given type to a binary file object.
+        For columnar types these are the raw rows and Arrow schema from
+        prepare_export(columnar=True).
+        """
+        if export_type in ExportService.COLUMNAR_TYPES:
+            return ExportService.write_columnar(export_type, output, rows, column_headers, progress)
+        if export_type == 'excel':
+            return ExportService.write_excel(output, rows, column_headers, progress)
+        if export_type == 'pdf':
+            return ExportService.write_pdf(output, rows, column_headers, title, progress)
+        return ExportService.write_csv(output, rows, column_headers, progress)
+
+    @staticmethod
+    def response(export_type: str, rows: Iterable[List[Any]], column_headers: List[str], filename: str,
+                 title: str = "Export"):
+        """Download response for rows as an export of the given type (see write)."""
+        if export_type in ExportService.COLUMNAR_TYPES:
+            return ExportService.columnar_response(export_type, rows, column_headers, filename)
+        if export_type == 'excel':
+            return ExportService.excel_response(rows, column_headers, filename)
+        if export_type == 'pdf':
+            return ExportService.pdf_response(rows, column_headers, filename, title)
+        return ExportService.csv_response(rows, column_headers, filename)
+
+    @staticmethod
+    def pdf_response(rows: Iterable[List[Any]], column_headers: List[str], filename: str,
+                     title: str = "Export") -> HttpResponse:
+        output = io.BytesIO()
+        ExportService.write_pdf(output, rows, column_headers, title)
         output.seek(0)
 
         response = HttpResponse(output.read(), content_type='application/pdf')
@@ -222,11 +664,13 @@ class ExportService:
         return response
 
 
-def log_export(user, export_type: str, data_type: str, record_count: int, file_size: int = None, filters: dict = None, ip_address: str = None):
-    """Log an export action."""
+def log_export(user, export_type: str, data_type: str, record_count: int, file_size: int = None, filters: dict = None, ip_address: str = None, job=None, watermark=None):
+    """Log an export action; watermark is when the exported data was read."""
     from .models import ExportLog
     ExportLog.objects.create(
         user=user,
+        job=job,
+        watermark=watermark,
         export_type=export_type,
         data_type=data_type,
         record_count=record_count,
@@ -234,3 +678,123 @@ def log_export(user, export_type: str, data_type: str, record_count: int, file_s
         filters_applied=filters or {},
         ip_address=ip_address,
     )
+
+
+def export_job_data(job) -> dict:
+    """Status payload for an export job, for polling and WebSocket updates."""
+    return {
+        'id': job.id,
+        'data_type': job.data_type,
+        'export_type': job.export_type,
+        'status': job.status,
+        'progress': job.progress,
+        'record_count': job.record_count,
+        'file_size': job.file_size,
+        'error': job.error or None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'download_url': reverse('export-job-download', args=[job.id]) if job.status == 'completed' else None,
+    }
+
+
+def notify_export_job(job):
+    """Push the job's status to its owner's notifications WebSocket group."""
+    try:
+        from channels.layers import get_channel_layer
+        from asgiref.sync import async_to_sync
+
+        channel_layer = get_channel_layer()
+        if channel_layer:
+            async_to_sync(channel_layer.group_send)(
+                f"notifications_{job.user_id}",
+                {
+                    "type": "export_progress",
+                    "job": export_job_data(job),
+                }
+            )
+    except Exception as e:
+        logger.warning(f"Could not push progress for export job {job.id}: {e}")
+
+
+class ExportProgress:
+    """Progress callback that records and pushes whole-percent changes."""
+
+    # Don't write or push more often than every this many percent
+    STEP = 5
+
+    def __init__(self, job, total: int):
+        self.job = job
+        self.total = total
+
+    def __call__(self, done: int):
+        from .models import ExportJob
+        if not self.total:
+            return
+        # 100 is reserved for the finished, stored file
+        percent = min(99, done * 100 // self.total)
+        if percent - self.job.progress < self.STEP:
+            return
+        self.job.progress = percent
+        ExportJob.objects.filter(pk=self.job.pk).update(progress=percent)
+        notify_export_job(self.job)
+
+
+def run_export_job(job_id: int):
+    """Build a queued export, store the file and log it (runs in a Celery worker)."""
+    from .models import ExportJob
+
+    # Claim the job with a single conditional UPDATE, so of two workers
+    # handed the same job (a redelivered task, a retry) only one runs it
+    claimed = ExportJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', started_at=timezone.now()
+    )
+    job = ExportJob.objects.select_related('user').get(pk=job_id)
+    if not claimed:
+        # Already picked up by another worker or a previous attempt
+        return job
+    notify_export_job(job)
+
+    try:
+        rows, headers, total = ExportService.prepare_export(
+            job.data_type, job.columns, job.filters,
+            columnar=job.export_type in ExportService.COLUMNAR_TYPES,
+        )
+        extension = ExportService.FILE_EXTENSIONS.get(job.export_type, 'csv')
+        filename = f"{job.data_type}_export_{job.created_at.strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+        # Built on disk, not in memory, then copied to storage
+        with tempfile.TemporaryFile() as output:
+            job.record_count = ExportService.write(
+                job.export_type, output, rows, headers,
+                title=ExportService.TITLES.get(job.data_type, "Export"),
+                progress=ExportProgress(job, total),
+            )
+            job.file_size = output.seek(0, os.SEEK_END)
+            output.seek(0)
+            job.file.save(filename, File(output), save=False)
+    except Exception as e:
+        logger.exception(f"Export job {job.id} failed")
+        job.status = 'failed'
+        job.error = str(e)[:1000]
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        notify_export_job(job)
+        return job
+
+    job.status = 'completed'
+    job.progress = 100
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'record_count', 'file', 'file_size', 'finished_at'])
+    log_export(
+        user=job.user,
+        export_type=job.export_type,
+        data_type=job.data_type,
+        record_count=job.record_count,
+        file_size=job.file_size,
+        filters=job.filters,
+        ip_address=job.ip_address,
+        job=job,
+        watermark=job.started_at,
+    )
+    notify_export_job(job)
+    return job
@@ -0,0 +1,324 @@
+# core/facets.py
+"""
+Facet counts for the marketplace filter sidebar.
+
+Instead of one GROUP BY per filter dimension on every page view, the facet
+values of every live listing are kept in a small index. The index lives in
+the shared cache and is memoised per process; Vehicle save/delete signals
+and the admin bulk actions patch entries instead of rebuilding it. Counts
+are computed in memory and conditioned on the active filters: each dimension
+is counted over the listings that match every *other* active filter, so the
+sidebar can show the alternatives to the current selection.
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# (min, max) price buckets; max is exclusive, None means open-ended
+PRICE_BUCKETS = [
+    (0, 5000),
+    (5000, 10000),
+    (10000, 20000),
+    (20000, 35000),
+    (35000, 50000),
+    (50000, None),
+]
+
+# Dimensions matched case-insensitively against the query param of the same name
+TEXT_DIMENSIONS = ('make', 'model', 'body_type', 'fuel_type')
+FACET_DIMENSIONS = TEXT_DIMENSIONS + ('year', 'price')
+
+
+def price_bucket(price):
+    """Index into PRICE_BUCKETS for a price, or None if the price is missing."""
+    if price is None:
+        return None
+    price = float(price)
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        if price >= low and (high is None or price < high):
+            return index
+    return None
+
+
+class FacetIndex:
+    """
+    Facet values of live marketplace listings, keyed by vehicle id.
+
+    Next to the entries the stored index keeps, per dimension, the set of
+    vehicle ids under each facet value. Unfiltered counts are just the sizes
+    of those sets, and active filters are resolved by intersecting them, so
+    a request only walks the listings that survive the other filters.
+    """
+
+    # Stored layout changed with the posting sets; a new key skips old payloads
+    INDEX_KEY = 'marketplace_facets:index:v2'
+    VERSION_KEY = 'marketplace_facets:version'
+    LOCK_KEY = 'marketplace_facets:lock'
+    # Full rebuilds happen at least this often, healing any missed update
+    INDEX_TIMEOUT = 60 * 60
+
+    FIELDS = ('id', 'make', 'model', 'body_type', 'fuel_type', 'year', 'price')
+
+    def __init__(self):
+        self._local_version = None
+        self._local_index = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def live_queryset():
+        from .models import LIVE_MARKETPLACE_VEHICLE, Vehicle
+        return Vehicle.objects.filter(LIVE_MARKETPLACE_VEHICLE)
+
+    @staticmethod
+    def is_live(vehicle):
+        return (
+            vehicle.verification_state == 'physical'
+            and vehicle.is_visible
+            and vehicle.listing_type == 'marketplace'
+        )
+
+    @staticmethod
+    def make_entry(make, model, body_type, fuel_type, year, price):
+        return {
+            'make': (make or '').strip() or None,
+            'model': (model or '').strip() or None,
+            'body_type': (body_type or '').strip() or None,
+            'fuel_type': (fuel_type or '').strip() or None,
+            'year': year,
+            'price': float(price) if price is not None else None,
+        }
+
+    @staticmethod
+    def facet_key(dimension, entry):
+        """Value an entry is counted under for a dimension, or None if it has none."""
+        if dimension == 'price':
+            return price_bucket(entry['price'])
+        if dimension == 'year':
+            return entry['year']
+        label = entry[dimension]
+        return label.lower() if label else None
+
+    @classmethod
+    def _add(cls, index, vehicle_id, entry):
+        index['entries'][vehicle_id] = entry
+        for dimension in FACET_DIMENSIONS:
+            key = cls.facet_key(dimension, entry)
+            if key is None:
+                continue
+            index['postings'][dimension].setdefault(key, set()).add(vehicle_id)
+            if dimension in TEXT_DIMENSIONS:
+                index['labels'][dimension].setdefault(key, entry[dimension])
+
+    @classmethod
+    def _discard(cls, index, vehicle_id):
+        entry = index['entries'].pop(vehicle_id, None)
+        if entry is None:
+            return
+        for dimension in FACET_DIMENSIONS:
+            key = cls.facet_key(dimension, entry)
+            ids = index['postings'][dimension].get(key)
+            if ids is None:
+                continue
+            ids.discard(vehicle_id)
+            if not ids:
+                del index['postings'][dimension][key]
+                index['labels'].get(dimension, {}).pop(key, None)
+
+    @classmethod
+    def build(cls, entries):
+        index = {
+            'entries': {},
+            'postings': {dimension: {} for dimension in FACET_DIMENSIONS},
+            'labels': {dimension: {} for dimension in TEXT_DIMENSIONS},
+        }
+        for vehicle_id, entry in entries.items():
+            cls._add(index, vehicle_id, entry)
+        return index
+
+    def rebuild(self):
+        """Rebuild the whole index with a single query."""
+        index = self.build({
+            row[0]: self.make_entry(*row[1:])
+            for row in self.live_queryset().values_list(*self.FIELDS).iterator()
+        })
+        self._store(index)
+        return index
+
+    def _store(self, index):
+        version = time.time()
+        index['version'] = version
+        cache.set(self.INDEX_KEY, index, timeout=self.INDEX_TIMEOUT)
+        cache.set(self.VERSION_KEY, version, timeout=self.INDEX_TIMEOUT)
+        with self._lock:
+            self._local_version, self._local_index = version, index
+
+    def index(self):
+        """Current index, from process memory when it is still up to date."""
+        version = cache.get(self.VERSION_KEY)
+        if version is not None and version == self._local_version:
+            return self._local_index
+
+        stored = cache.get(self.INDEX_KEY)
+        if stored is None:
+            return self.rebuild()
+        with self._lock:
+            self._local_version, self._local_index = stored['version'], stored
+        return stored
+
+    def _patch(self, changes):
+        """Apply {vehicle_id: entry} changes; an entry of None drops the vehicle."""
+        deadline = time.time() + 2
+        while True:
+            added = cache.add(self.LOCK_KEY, 1, timeout=5)
+            if added:
+                break
+            if added is None:
+                # Cache unavailable: there is no shared index to patch, and
+                # reads rebuild from the database until it is back
+                return
+            if time.time() > deadline:
+                # Writer seems stuck; force a rebuild rather than lose an update
+                logger.warning(f"Facet index busy, dropping it to apply vehicles {sorted(changes)}")
+                self.invalidate()
+                return
+            time.sleep(0.02)
+        try:
+            stored = cache.get(self.INDEX_KEY)
+            if stored is None:
+                # Nothing cached yet; the next read rebuilds from the database
+                return
+            for vehicle_id, entry in changes.items():
+                self._discard(stored, vehicle_id)
+                if entry is not None:
+                    self._add(stored, vehicle_id, entry)
+            self._store(stored)
+        finally:
+            cache.delete(self.LOCK_KEY)
+
+    def invalidate(self):
+        cache.delete_many([self.INDEX_KEY, self.VERSION_KEY])
+
+    def update_vehicle(self, vehicle):
+        if self.is_live(vehicle):
+            entry = self.make_entry(
+                vehicle.make, vehicle.model, vehicle.body_type,
+                vehicle.fuel_type, vehicle.year, vehicle.price,
+            )
+        else:
+            entry = None
+        self._patch({vehicle.pk: entry})
+
+    def remove_vehicle(self, vehicle_id):
+        self._patch({vehicle_id: None})
+
+    def refresh_vehicles(self, vehicle_ids):
+        """
+        Re-read vehicles from the database and patch them in one go, for
+        queryset updates that bypass the save signals.
+        """
+        changes = dict.fromkeys(vehicle_ids)
+        rows = self.live_queryset().filter(pk__in=changes).values_list(*self.FIELDS)
+        for row in rows:
+            changes[row[0]] = self.make_entry(*row[1:])
+        if changes:
+            self._patch(changes)
+
+    @staticmethod
+    def parse_filters(params):
+        """Extract active facet filters from marketplace-style query params."""
+        filters = {}
+        for dimension in TEXT_DIMENSIONS:
+            value = params.get(dimension)
+            if value:
+                filters[dimension] = value.strip().lower()
+        year = params.get('year')
+        if year:
+            try:
+                filters['year'] = int(year)
+            except ValueError:
+                pass
+        try:
+            min_price = float(params['minPrice']) if params.get('minPrice') else None
+            max_price = float(params['maxPrice']) if params.get('maxPrice') else None
+        except ValueError:
+            min_price = max_price = None
+        if min_price is not None or max_price is not None:
+            filters['price'] = (min_price, max_price)
+        return filters
+
+    @staticmethod
+    def _matching_ids(index, dimension, wanted):
+        """Ids of the listings passing one filter."""
+        postings = index['postings'][dimension]
+        if dimension != 'price':
+            return postings.get(wanted, set())
+        # Only buckets overlapping the range can hold a match
+        low, high = wanted
+        matching = set()
+        for bucket, (bucket_low, bucket_high) in enumerate(PRICE_BUCKETS):
+            if (high is not None and bucket_low > high) or (
+                    low is not None and bucket_high is not None and bucket_high <= low):
+                continue
+            for vehicle_id in postings.get(bucket, ()):
+                price = index['entries'][vehicle_id]['price']
+                if (low is None or price >= low) and (high is None or price <= high):
+                    matching.add(vehicle_id)
+        return matching
+
+    def counts(self, params):
+        """Counts for every facet dimension, conditioned on the active filters."""
+        filters = self.parse_filters(params)
+        index = self.index()
+        entries, postings = index['entries'], index['postings']
+        matching = {
+            dimension: self._matching_ids(index, dimension, wanted)
+            for dimension, wanted in filters.items()
+        }
+
+        def passing(excluded=None):
+            """Ids passing every active filter but `excluded`, or None for all listings."""
+            sets = sorted((ids for d, ids in matching.items() if d != excluded), key=len)
+            if not sets:
+                return None
+            return sets[0].intersection(*sets[1:])
+
+        counters = {}
+        for dimension in FACET_DIMENSIONS:
+            # Each dimension is counted over the listings matching every other filter
+            ids = passing(excluded=dimension)
+            if ids is None:
+                counters[dimension] = {key: len(members) for key, members in postings[dimension].items()}
+                continue
+            counter = counters[dimension] = {}
+            for vehicle_id in ids:
+                key = self.facet_key(dimension, entries[vehicle_id])
+                if key is not None:
+                    counter[key] = counter.get(key, 0) + 1
+
+        matching_all = passing()
+        total = len(entries) if matching_all is None else len(matching_all)
+
+        labels = index['labels']
+        facets = {}
+        for dimension in TEXT_DIMENSIONS:
+            facets[dimension] = sorted(
+                ({'value': labels[dimension][key], 'count': count}
+                 for key, count in counters[dimension].items()),
+                key=lambda item: (-item['count'], item['value'].lower()),
+            )
+        facets['year'] = [
+            {'value': year, 'count': count}
+            for year, count in sorted(counters['year'].items(), reverse=True)
+        ]
+        facets['price'] = [
+            {'min': PRICE_BUCKETS[bucket][0], 'max': PRICE_BUCKETS[bucket][1], 'count': count}
+            for bucket, count in sorted(counters['price'].items())
+        ]
+        return {'total': total, 'facets': facets}
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,66 @@
+# core/management/commands/backfill_mileage.py
+"""
+Populate Vehicle.mileage_km from the free-form mileage text.
+
+Usage:
+    python manage.py backfill_mileage
+    python manage.py backfill_mileage --batch-size 2000 --show-unparsed
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.caching import marketplace_cache
+from core.mileage import parse_mileage
+from core.models import Vehicle
+
+
+class Command(BaseCommand):
+    help = "Backfill the normalised mileage_km column on vehicles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--show-unparsed',
+            action='store_true',
+            help="List mileage values that could not be parsed",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        updated = 0
+        unparsed = 0
+        last_id = 0
+        stale_scopes = set()
+        now = timezone.now()
+        while True:
+            batch = list(
+                Vehicle.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'make', 'body_type', 'mileage', 'mileage_km')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            changed = []
+            for vehicle in batch:
+                mileage_km = parse_mileage(vehicle.mileage)
+                if mileage_km is None and vehicle.mileage:
+                    unparsed += 1
+                    if options['show_unparsed']:
+                        self.stdout.write(f"  vehicle {vehicle.id}: {vehicle.mileage!r}")
+                if vehicle.mileage_km != mileage_km:
+                    vehicle.mileage_km = mileage_km
+                    vehicle.updated_at = now
+                    changed.append(vehicle)
+                    stale_scopes.update(marketplace_cache.scopes_for_vehicle(vehicle))
+            Vehicle.objects.bulk_update(changed, ['mileage_km', 'updated_at'])
+            updated += len(changed)
+            self.stdout.write(f"Processed vehicles up to id {last_id} ({updated} updated)")
+
+        # bulk_update bypasses signals, so invalidate cached pages ourselves
+        marketplace_cache.bump(*stale_scopes)
+
+        if unparsed:
+            self.stdout.write(self.style.WARNING(f"{unparsed} mileage values could not be parsed"))
+        self.stdout.write(self.style.SUCCESS(f"Backfilled mileage_km on {updated} vehicles"))
@@ -0,0 +1,76 @@
+# core/management/commands/backfill_primary_images.py
+"""
+Populate Vehicle.primary_image for rows created before it was denormalized.
+
+Usage:
+    python manage.py backfill_primary_images
+    python manage.py backfill_primary_images --thumbnails --batch-size 1000
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.db.models import OuterRef, Subquery
+
+from core.caching import marketplace_cache
+from core.models import Vehicle, VehicleImage
+from core.tasks import queue_primary_thumbnail
+
+
+class Command(BaseCommand):
+    help = "Backfill the denormalized primary image (and optionally thumbnails) on vehicles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--thumbnails',
+            action='store_true',
+            help="Queue thumbnail generation for vehicles that have an image but no thumbnail",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        first_image = VehicleImage.objects.filter(
+            vehicle=OuterRef('pk')
+        ).order_by('position', 'id').values('image')[:1]
+
+        updated = 0
+        last_id = 0
+        stale_scopes = set()
+        now = timezone.now()
+        while True:
+            batch = list(
+                Vehicle.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .annotate(first_image=Subquery(first_image))
+                .only('id', 'make', 'body_type', 'primary_image')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            changed = []
+            for vehicle in batch:
+                name = vehicle.first_image or ''
+                if vehicle.primary_image != name:
+                    vehicle.primary_image = name
+                    vehicle.primary_thumbnail = ''
+                    vehicle.updated_at = now
+                    changed.append(vehicle)
+                    stale_scopes.update(marketplace_cache.scopes_for_vehicle(vehicle))
+            Vehicle.objects.bulk_update(changed, ['primary_image', 'primary_thumbnail', 'updated_at'])
+            updated += len(changed)
+            self.stdout.write(f"Processed vehicles up to id {last_id} ({updated} updated)")
+
+        # bulk_update bypasses signals, so invalidate cached pages ourselves
+        marketplace_cache.bump(*stale_scopes)
+
+        if options['thumbnails']:
+            pending = Vehicle.objects.exclude(primary_image='').filter(
+                primary_thumbnail=''
+            ).values_list('id', flat=True)
+            queued = 0
+            for vehicle_id in pending.iterator():
+                queue_primary_thumbnail(vehicle_id)
+                queued += 1
+            self.stdout.write(f"Queued {queued} thumbnail jobs")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled primary image on {updated} vehicles"))
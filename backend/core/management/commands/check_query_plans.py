@@ -0,0 +1,149 @@
+# core/management/commands/check_query_plans.py
+"""
+Guard the live-listing read paths against regressing to sequential scans.
+
+Seeds a large synthetic set of vehicles inside a transaction, runs the real
+endpoints (marketplace list in its common variants, the vehicle id list and
+the sitemap), EXPLAINs every query they issue against core_vehicle and exits
+non-zero if any plan contains a Seq Scan on it. Everything is rolled back.
+The number of queries each endpoint issues is pinned separately by
+QueryCountTests in core/tests.py, which runs with the test suite.
+
+Usage:
+    python manage.py check_query_plans
+    python manage.py check_query_plans --rows 50000 --verbose
+"""
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from core.models import Vehicle
+from core.sitemaps import VehicleSitemap
+from core.views import MarketplaceView, vehicle_id_list
+
+MAKES = ['Toyota', 'Honda', 'Mazda', 'Nissan', 'BMW', 'Mercedes', 'Ford', 'Isuzu', 'Mitsubishi', 'Subaru']
+BODY_TYPES = ['Sedan', 'SUV', 'Hatchback', 'Pickup', 'Van']
+
+# Marketplace variants that must stay on an index
+MARKETPLACE_QUERIES = [
+    {},
+    {'page': '3'},
+    {'sortBy': 'priceLowHigh'},
+    {'sortBy': 'priceHighLow'},
+    {'make': 'Toyota'},
+    {'sortBy': 'mileageLowHigh'},
+    {'sortBy': 'mileageHighLow', 'pagination': 'cursor'},
+    {'pagination': 'cursor'},
+]
+
+
+class Command(BaseCommand):
+    help = "Fail if the live-listing read paths plan a sequential scan on core_vehicle"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help="Synthetic vehicles to seed")
+        parser.add_argument(
+            '--live-ratio', type=float, default=0.1,
+            help="Fraction of seeded vehicles that are live on the marketplace "
+                 "(most rows of a mature table are sold, pending or hidden)",
+        )
+        parser.add_argument('--verbose', action='store_true', help="Print every plan")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Query plans can only be checked against PostgreSQL")
+
+        failures = []
+        with transaction.atomic():
+            self.seed(options['rows'], options['live_ratio'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE core_vehicle')
+
+            for name, run in self.endpoints():
+                with CaptureQueriesContext(connection) as captured:
+                    run()
+                for query in captured.captured_queries:
+                    sql = query['sql']
+                    if not sql.lstrip().upper().startswith('SELECT') or '"core_vehicle"' not in sql:
+                        continue
+                    plan = self.explain(sql)
+                    if options['verbose']:
+                        self.stdout.write(f"-- {name}\n{sql}\n{plan}\n")
+                    if 'Seq Scan on core_vehicle' in plan:
+                        failures.append((name, sql, plan))
+
+            transaction.set_rollback(True)
+
+        for name, sql, plan in failures:
+            self.stderr.write(f"Sequential scan in {name}:\n{sql}\n{plan}\n")
+        if failures:
+            raise CommandError(f"{len(failures)} queries fell back to a sequential scan")
+        self.stdout.write(self.style.SUCCESS("All live-listing queries use an index"))
+
+    def seed(self, rows, live_ratio):
+        # bulk_create skips the save signals (emails, cache and index updates)
+        User = get_user_model()
+        owner = User.objects.bulk_create([User(username=f"plan-check-{uuid.uuid4().hex[:12]}")])[0]
+        rng = random.Random(0)
+        now = timezone.now()
+        prefix = uuid.uuid4().hex[:5].upper()
+        batch = []
+        for i in range(rows):
+            live = rng.random() < live_ratio
+            marketplace = live or rng.random() < 0.7
+            price = Decimal(rng.randrange(1000, 80000))
+            mileage = rng.randrange(0, 300000) if rng.random() < 0.9 else None
+            batch.append(Vehicle(
+                owner=owner,
+                make=rng.choice(MAKES),
+                model=f"Model {rng.randrange(50)}",
+                body_type=rng.choice(BODY_TYPES),
+                vin=f"{prefix}{i:012d}",
+                year=rng.randrange(1995, 2025),
+                mileage=f"{mileage} km" if mileage is not None else '',
+                mileage_km=mileage,
+                listing_type='marketplace' if marketplace else 'instant_sale',
+                price=price if marketplace else None,
+                proposed_price=None if marketplace else price,
+                verification_state='physical' if live else rng.choice(['pending', 'digital']),
+                is_visible=live or rng.random() < 0.5,
+            ))
+            if len(batch) >= 2000:
+                Vehicle.objects.bulk_create(batch)
+                batch = []
+        Vehicle.objects.bulk_create(batch)
+        # created_at is auto_now_add; spread it so date ordering is realistic
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE core_vehicle SET created_at = %s - (id %% 1000) * interval '1 hour' WHERE owner_id = %s",
+                [now - timedelta(days=1), owner.pk],
+            )
+
+    def endpoints(self):
+        factory = APIRequestFactory()
+
+        def marketplace(params):
+            def run():
+                view = MarketplaceView()
+                request = view.initialize_request(factory.get('/core/marketplace/', params))
+                # Bypass the response cache so the queries actually run
+                view.build_response_data(request)
+            return run
+
+        for params in MARKETPLACE_QUERIES:
+            yield f"marketplace {params or '(default)'}", marketplace(params)
+        yield "vehicle id list", lambda: vehicle_id_list(factory.get('/core/vehicles/ids/'))
+        yield "sitemap", lambda: list(VehicleSitemap().items()[:VehicleSitemap.limit])
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}")
+            return "\n".join(row[0] for row in cursor.fetchall())
@@ -0,0 +1,46 @@
+# core/management/commands/manage_partitions.py
+"""
+Create upcoming monthly partitions for the analytics event tables and
+expire the ones past the retention window.
+
+Usage:
+    python manage.py manage_partitions
+    python manage.py manage_partitions --months-ahead 6 --retention-months 24
+    python manage.py manage_partitions --detach-only
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.analytics.partitions import MONTHS_AHEAD, manage_partitions
+
+
+class Command(BaseCommand):
+    help = "Maintain monthly partitions of core_vehicleview and core_websitevisit"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD)
+        parser.add_argument(
+            '--retention-months', type=int, default=None,
+            help="Override ANALYTICS_RETENTION_MONTHS (0 keeps everything)",
+        )
+        parser.add_argument(
+            '--detach-only', action='store_true',
+            help="Detach expired partitions but keep them as standalone tables",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Partitions are only used on PostgreSQL")
+
+        summary = manage_partitions(
+            months_ahead=options['months_ahead'],
+            retention_months=options['retention_months'],
+            drop=not options['detach_only'],
+        )
+        verb = 'Detached' if options['detach_only'] else 'Dropped'
+        for table, changes in summary.items():
+            for name in changes['created']:
+                self.stdout.write(f"Created {name}")
+            for name in changes['expired']:
+                self.stdout.write(f"{verb} {name}")
+        self.stdout.write(self.style.SUCCESS("Analytics partitions are up to date"))
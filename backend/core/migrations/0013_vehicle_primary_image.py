@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_vehicledraft"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="vehicleimage",
+            options={"ordering": ["position", "id"]},
+        ),
+        migrations.AddField(
+            model_name="vehicle",
+            name="primary_image",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Storage name of the first vehicle image (kept in sync automatically)",
+                max_length=255,
+            ),
+        ),
+        migrations.AddField(
+            model_name="vehicle",
+            name="primary_thumbnail",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Storage name of the primary image thumbnail (kept in sync automatically)",
+                max_length=255,
+            ),
+        ),
+        migrations.AddField(
+            model_name="vehicleimage",
+            name="position",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Display order; the first image is the primary one"
+            ),
+        ),
+    ]
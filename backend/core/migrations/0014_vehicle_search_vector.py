@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:16
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    # Mirrors core.search.database.vehicle_search_vector at the time of writing
+    SearchVector = django.contrib.postgres.search.SearchVector
+    Vehicle = apps.get_model("core", "Vehicle")
+    Vehicle.objects.update(
+        search_vector=(
+            SearchVector("make", weight="A", config="english")
+            + SearchVector("model", weight="A", config="english")
+            + SearchVector("description", weight="B", config="english")
+            + SearchVector("location", weight="C", config="english")
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_vehicle_primary_image"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vehicle",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="vehicle_search_vector_gin"
+            ),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:17
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_vehicle_search_vector"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["make"], name="vehicle_make_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["model"], name="vehicle_model_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["location"],
+                name="vehicle_location_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
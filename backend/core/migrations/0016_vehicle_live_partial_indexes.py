@@ -0,0 +1,62 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:19
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_vehicle_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_visible", True),
+                    ("verification_state", "physical"),
+                    ("listing_type", "marketplace"),
+                ),
+                fields=["-created_at", "-id"],
+                name="vehicle_live_recent",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_visible", True),
+                    ("verification_state", "physical"),
+                    ("listing_type", "marketplace"),
+                ),
+                fields=["price", "id"],
+                name="vehicle_live_price",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=models.Index(
+                django.db.models.functions.text.Upper("make"),
+                condition=models.Q(
+                    ("is_visible", True),
+                    ("verification_state", "physical"),
+                    ("listing_type", "marketplace"),
+                ),
+                name="vehicle_live_make_upper",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_visible", True), ("verification_state", "physical")
+                ),
+                fields=["-created_at", "id"],
+                name="vehicle_public_recent",
+            ),
+        ),
+    ]
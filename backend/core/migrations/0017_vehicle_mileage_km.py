@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_vehicle_live_partial_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vehicle",
+            name="mileage_km",
+            field=models.PositiveIntegerField(
+                blank=True,
+                editable=False,
+                help_text="Mileage normalised to kilometres (empty if it could not be parsed)",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_visible", True),
+                    ("verification_state", "physical"),
+                    ("listing_type", "marketplace"),
+                ),
+                fields=["mileage_km", "id"],
+                name="vehicle_live_mileage",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=models.Index(
+                models.OrderBy(
+                    models.F("mileage_km"), descending=True, nulls_last=True
+                ),
+                models.OrderBy(models.F("id"), descending=True),
+                condition=models.Q(
+                    ("is_visible", True),
+                    ("verification_state", "physical"),
+                    ("listing_type", "marketplace"),
+                ),
+                name="vehicle_live_mileage_desc",
+            ),
+        ),
+    ]
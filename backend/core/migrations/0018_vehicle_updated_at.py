@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_vehicle_mileage_km"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vehicle",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
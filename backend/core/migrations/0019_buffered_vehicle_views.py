@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0018_vehicle_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vehicle",
+            name="view_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="vehicleview",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0019_buffered_vehicle_views"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="vehicleview",
+            name="timestamp",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+        migrations.AlterField(
+            model_name="websitevisit",
+            name="timestamp",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name="PathVisitDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("path", models.CharField(max_length=255)),
+                ("date", models.DateField()),
+                ("visits", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["date"], name="path_visit_daily_date")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("path", "date"), name="unique_path_visit_day"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="VehicleViewDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                (
+                    "vehicle",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_views",
+                        to="core.vehicle",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["date"], name="vehicle_view_daily_date")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("vehicle", "date"), name="unique_vehicle_view_day"
+                    )
+                ],
+            },
+        ),
+    ]
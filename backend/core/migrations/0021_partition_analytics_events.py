@@ -0,0 +1,120 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:32
+
+from datetime import date
+
+from django.db import migrations
+
+# Range partitioned on "timestamp", one partition per month; see
+# core.analytics.partitions for the ongoing maintenance. Postgres requires
+# the partition key in the primary key, so it becomes (id, timestamp); the
+# models keep treating id as their primary key, which stays unique because
+# every row still draws it from the table's sequence.
+TABLES = ("core_vehicleview", "core_websitevisit")
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def _capture(cursor, table):
+    """Secondary index and foreign key definitions, to recreate on the new table."""
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+        [table, f"{table}_pkey"],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    return indexes, foreign_keys
+
+
+def _restore(cursor, table, indexes, foreign_keys):
+    for indexdef in indexes:
+        cursor.execute(indexdef.replace(" ON ONLY ", " ON "))
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLES:
+            legacy = f"{table}_unpartitioned"
+            indexes, foreign_keys = _capture(cursor, table)
+            cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+            cursor.execute(
+                f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+                f'PARTITION BY RANGE ("timestamp")'
+            )
+            cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+            cursor.execute(f'SELECT min("timestamp") FROM "{legacy}"')
+            oldest = cursor.fetchone()[0]
+            # Carry the id sequence on, even past rows that were deleted
+            cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [legacy])
+            last_id = cursor.fetchone()[0]
+            current = date.today().replace(day=1)
+            month = oldest.date().replace(day=1) if oldest else current
+            while month <= _add_months(current, MONTHS_AHEAD):
+                cursor.execute(
+                    f'CREATE TABLE "{table}_p{month.year:04d}_{month.month:02d}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ({_bound(month)}) TO ({_bound(_add_months(month, 1))})"
+                )
+                month = _add_months(month, 1)
+
+            cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+            # Drops the identity sequence and frees the index/constraint names
+            cursor.execute(f'DROP TABLE "{legacy}"')
+
+            cursor.execute(f'CREATE SEQUENCE "{table}_id_seq" OWNED BY "{table}".id')
+            cursor.execute(f"SELECT setval('\"{table}_id_seq\"', %s)", [last_id])
+            cursor.execute(f'ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval(\'"{table}_id_seq"\')')
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY (id, "timestamp")')
+            _restore(cursor, table, indexes, foreign_keys)
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLES:
+            partitioned = f"{table}_partitioned"
+            indexes, foreign_keys = _capture(cursor, table)
+            cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{partitioned}"')
+            cursor.execute(
+                f'CREATE TABLE "{table}" (LIKE "{partitioned}" INCLUDING CONSTRAINTS)'
+            )
+            cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{partitioned}"')
+            cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [partitioned])
+            last_id = cursor.fetchone()[0]
+            # Drops every partition and the sequence owned by the old table
+            cursor.execute(f'DROP TABLE "{partitioned}"')
+
+            cursor.execute(
+                f'ALTER TABLE "{table}" ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY '
+                f"(START WITH {last_id + 1})"
+            )
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY (id)')
+            _restore(cursor, table, indexes, foreign_keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_analytics_daily_rollups"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:40
+
+import core.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0021_partition_analytics_events"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "export_type",
+                    models.CharField(
+                        choices=[("excel", "Excel"), ("csv", "CSV"), ("pdf", "PDF")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "data_type",
+                    models.CharField(
+                        choices=[
+                            ("vehicles", "Vehicles"),
+                            ("bids", "Bids"),
+                            ("users", "Users"),
+                            ("quotes", "Quotes"),
+                        ],
+                        default="vehicles",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "columns",
+                    models.JSONField(
+                        default=list, help_text="Columns to include, in order"
+                    ),
+                ),
+                ("filters", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "progress",
+                    models.PositiveSmallIntegerField(
+                        default=0, help_text="Percent complete"
+                    ),
+                ),
+                ("record_count", models.PositiveIntegerField(default=0)),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True, upload_to=core.models.export_upload_path
+                    ),
+                ),
+                (
+                    "file_size",
+                    models.PositiveIntegerField(
+                        blank=True, help_text="File size in bytes", null=True
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("ip_address", models.GenericIPAddressField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="export_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Export Job",
+                "verbose_name_plural": "Export Jobs",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="exportlog",
+            name="job",
+            field=models.OneToOneField(
+                blank=True,
+                help_text="Background job that produced this export, if any",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="log",
+                to="core.exportjob",
+            ),
+        ),
+    ]
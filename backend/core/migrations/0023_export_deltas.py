@@ -0,0 +1,77 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:51
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_bid_updated_at(apps, schema_editor):
+    # Existing bids got the migration time; their creation time is closer
+    Bid = apps.get_model("core", "Bid")
+    Bid.objects.update(updated_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0022_export_jobs"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "data_type",
+                    models.CharField(
+                        choices=[
+                            ("vehicles", "Vehicles"),
+                            ("bids", "Bids"),
+                            ("users", "Users"),
+                            ("quotes", "Quotes"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="bid",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill_bid_updated_at, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="exportlog",
+            name="watermark",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the exported data was read; delta exports from this export start here",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vehicle",
+            index=models.Index(
+                fields=["updated_at"], name="core_vehicl_updated_f91b38_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="exporttombstone",
+            index=models.Index(
+                fields=["data_type", "deleted_at"], name="export_tombstone_since"
+            ),
+        ),
+    ]
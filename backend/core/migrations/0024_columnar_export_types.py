@@ -0,0 +1,41 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_export_deltas"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="exportjob",
+            name="export_type",
+            field=models.CharField(
+                choices=[
+                    ("excel", "Excel"),
+                    ("csv", "CSV"),
+                    ("pdf", "PDF"),
+                    ("parquet", "Parquet"),
+                    ("arrow", "Arrow IPC"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="exportlog",
+            name="export_type",
+            field=models.CharField(
+                choices=[
+                    ("excel", "Excel"),
+                    ("csv", "CSV"),
+                    ("pdf", "PDF"),
+                    ("parquet", "Parquet"),
+                    ("arrow", "Arrow IPC"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
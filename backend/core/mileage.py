@@ -0,0 +1,45 @@
+# core/mileage.py
+"""
+Normalise the free-form Vehicle.mileage text into kilometres.
+
+Sellers type whatever they like: "120,000 km", "120 000kms", "75k miles",
+"85000". parse_mileage pulls out the first number, applies a "k"/"thousand"
+multiplier and converts miles, defaulting to kilometres like the form does.
+Anything it cannot make sense of becomes None rather than a wrong number.
+"""
+import re
+
+MILES_TO_KM = 1.609344
+# Readings above this are typos (extra zeros), not odometers
+MAX_MILEAGE_KM = 2_000_000
+
+_NUMBER_RE = re.compile(
+    r'(?P<number>\d{1,3}(?:[ ,.]\d{3})+|\d+(?:\.\d+)?)'
+    r'\s*(?P<thousands>k(?![a-z])|thousand)?'
+)
+_MILES_RE = re.compile(r'\b(?:mi|mile|miles)\b|\dmi\b|\dmiles\b')
+
+
+def parse_mileage(value):
+    """Mileage in whole kilometres, or None if value holds no usable reading."""
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    match = _NUMBER_RE.search(text)
+    if not match:
+        return None
+
+    number = match['number']
+    if re.fullmatch(r'\d{1,3}(?:[ ,.]\d{3})+', number):
+        # Grouped digits: "120,000", "120 000" and "120.000" are all separators
+        number = re.sub(r'[ ,.]', '', number)
+    km = float(number)
+    if match['thousands']:
+        km *= 1000
+    if _MILES_RE.search(text):
+        km *= MILES_TO_KM
+
+    km = round(km)
+    if km > MAX_MILEAGE_KM:
+        return None
+    return km
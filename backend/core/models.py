@@ -1,4 +1,5 @@
 # vehicles/models.py
+import uuid
 from datetime import timezone
 from django.db import models
 from django.db.models.signals import post_save
@@ -7,8 +8,14 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.validators import EmailValidator, RegexValidator
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import F
+from django.db.models.functions import Upper
 from model_utils import FieldTracker
 
+from .mileage import parse_mileage
+
 User = get_user_model()
 
 class Profile(models.Model):
@@ -63,6 +70,12 @@ class Notification(models.Model):
     def __str__(self):
         return f"{self.get_notification_type_display()} - {self.user.username}"
 
+# Vehicles the public read paths serve (sitemap, id list, search), and the
+# subset listed on the marketplace. The partial indexes on Vehicle cover
+# exactly these predicates, so queries must keep filtering on all of them.
+PUBLIC_VEHICLE = models.Q(verification_state='physical', is_visible=True)
+LIVE_MARKETPLACE_VEHICLE = PUBLIC_VEHICLE & models.Q(listing_type='marketplace')
+
 class Vehicle(models.Model):
     VERIFICATION_STATES = (
         ('pending', 'Pending'),
@@ -134,6 +147,13 @@ class Vehicle(models.Model):
         blank=True,
         help_text="Current vehicle mileage in kilometers"
     )
+    # Parsed from mileage on save, for range filters and sorting
+    mileage_km = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Mileage normalised to kilometres (empty if it could not be parsed)"
+    )
     proposed_price = models.DecimalField(
         max_digits=10, 
         decimal_places=2,
@@ -155,7 +175,26 @@ class Vehicle(models.Model):
     body_type = models.CharField(max_length=50, blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)  # For marketplace
     rejection_reason = models.TextField(blank=True, null=True)
+    # Denormalized from the first VehicleImage so list endpoints need no join/prefetch
+    primary_image = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        help_text="Storage name of the first vehicle image (kept in sync automatically)"
+    )
+    primary_thumbnail = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        help_text="Storage name of the primary image thumbnail (kept in sync automatically)"
+    )
+    # Weighted tsvector over make/model/description/location, see core/search/database.py
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Unique views, applied in batches by the view buffer flush
+    view_count = models.PositiveIntegerField(default=0)
+    # Also touched when the vehicle's images change; drives detail ETags
+    updated_at = models.DateTimeField(auto_now=True)
     tracker = FieldTracker()
 
     class Meta:
@@ -165,6 +204,24 @@ class Vehicle(models.Model):
             models.Index(fields=['make', 'model']),
             models.Index(fields=['price']),
             models.Index(fields=['created_at']),
+            # Delta exports select rows changed since a watermark
+            models.Index(fields=['updated_at']),
+            GinIndex(fields=['search_vector'], name='vehicle_search_vector_gin'),
+            # Trigram indexes for the fuzzy database search fallback
+            GinIndex(fields=['make'], name='vehicle_make_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['model'], name='vehicle_model_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['location'], name='vehicle_location_trgm', opclasses=['gin_trgm_ops']),
+            # Partial indexes for the live-listing hot paths
+            models.Index(fields=['-created_at', '-id'], name='vehicle_live_recent', condition=LIVE_MARKETPLACE_VEHICLE),
+            models.Index(fields=['price', 'id'], name='vehicle_live_price', condition=LIVE_MARKETPLACE_VEHICLE),
+            models.Index(Upper('make'), name='vehicle_live_make_upper', condition=LIVE_MARKETPLACE_VEHICLE),
+            models.Index(fields=['-created_at', 'id'], name='vehicle_public_recent', condition=PUBLIC_VEHICLE),
+            # Mileage sorts put listings without a reading last in both directions
+            models.Index(fields=['mileage_km', 'id'], name='vehicle_live_mileage', condition=LIVE_MARKETPLACE_VEHICLE),
+            models.Index(
+                F('mileage_km').desc(nulls_last=True), F('id').desc(),
+                name='vehicle_live_mileage_desc', condition=LIVE_MARKETPLACE_VEHICLE,
+            ),
         ]
 
         constraints = [
@@ -186,9 +243,42 @@ class Vehicle(models.Model):
 
     def __str__(self):
         return self.make
+
+    def save(self, *args, **kwargs):
+        self.mileage_km = parse_mileage(self.mileage)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # auto_now only persists when listed; delta exports rely on updated_at
+            extra = {'updated_at', 'mileage_km'} if 'mileage' in update_fields else {'updated_at'}
+            kwargs['update_fields'] = {*update_fields, *extra}
+        super().save(*args, **kwargs)
+
+    def refresh_primary_image(self):
+        """
+        Re-derive primary_image from the first image by position.
+        Returns True if it changed. Uses a queryset update so that
+        the Vehicle save signals (emails, edit notifications) don't fire.
+        """
+        first = self.images.order_by('position', 'id').values_list('image', flat=True).first() or ''
+        if first == self.primary_image:
+            return False
+        self.primary_image = first
+        self.primary_thumbnail = ''
+        self.updated_at = timezone.now()
+        Vehicle.objects.filter(pk=self.pk).update(
+            primary_image=first, primary_thumbnail='', updated_at=self.updated_at
+        )
+        return True
+
+    def touch(self):
+        """Bump updated_at without firing the save signals (e.g. images changed)."""
+        self.updated_at = timezone.now()
+        Vehicle.objects.filter(pk=self.pk).update(updated_at=self.updated_at)
     
+# WebsiteVisit and VehicleView are partitioned by month on timestamp in
+# PostgreSQL (migration 0021, core.analytics.partitions)
 class WebsiteVisit(models.Model):
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
     session_key = models.CharField(max_length=40, db_index=True)
     user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
     path = models.CharField(max_length=255)
@@ -196,7 +286,8 @@ class WebsiteVisit(models.Model):
 
 class VehicleView(models.Model):
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='views')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set explicitly by the buffered writer to when the view happened
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     session_key = models.CharField(max_length=40, db_index=True)
     user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
     ip_address = models.GenericIPAddressField()
@@ -206,6 +297,42 @@ class VehicleView(models.Model):
         self.view_count = models.F('view_count') + 1
         self.save(update_fields=['view_count'])
 
+
+class VehicleViewDaily(models.Model):
+    """Views per vehicle per day, rolled up from VehicleView (see core.analytics.rollups)."""
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vehicle', 'date'], name='unique_vehicle_view_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='vehicle_view_daily_date'),
+        ]
+
+    def __str__(self):
+        return f"Vehicle {self.vehicle_id} on {self.date}: {self.views} views"
+
+
+class PathVisitDaily(models.Model):
+    """Visits per path per day, rolled up from WebsiteVisit (see core.analytics.rollups)."""
+    path = models.CharField(max_length=255)
+    date = models.DateField()
+    visits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['path', 'date'], name='unique_path_visit_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='path_visit_daily_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.path} on {self.date}: {self.visits} visits"
+
 import logging
 
 logger = logging.getLogger(__name__)
@@ -218,6 +345,10 @@ class VehicleImage(models.Model):
         null=True
     )
     image = models.ImageField(upload_to='vehicle_images/')
+    position = models.PositiveIntegerField(default=0, help_text="Display order; the first image is the primary one")
+
+    class Meta:
+        ordering = ['position', 'id']
 
     def save(self, *args, **kwargs):
         """Override save to add debugging"""
@@ -267,6 +398,10 @@ class Bid(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=BID_STATUS, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Watermark for delta exports
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    tracker = FieldTracker(fields=['status'])
 
     def __str__(self):
         return f"{self.amount} bid for {self.vehicle}"
@@ -486,6 +621,8 @@ class ExportLog(models.Model):
         ('excel', 'Excel'),
         ('csv', 'CSV'),
         ('pdf', 'PDF'),
+        ('parquet', 'Parquet'),
+        ('arrow', 'Arrow IPC'),
     )
 
     DATA_TYPES = (
@@ -496,11 +633,19 @@ class ExportLog(models.Model):
     )
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_logs')
+    job = models.OneToOneField(
+        'ExportJob', null=True, blank=True, on_delete=models.SET_NULL, related_name='log',
+        help_text="Background job that produced this export, if any"
+    )
     export_type = models.CharField(max_length=20, choices=EXPORT_TYPES)
     data_type = models.CharField(max_length=20, choices=DATA_TYPES, default='vehicles')
     record_count = models.PositiveIntegerField()
     file_size = models.PositiveIntegerField(null=True, blank=True, help_text="File size in bytes")
     filters_applied = models.JSONField(default=dict, blank=True, help_text="Filters used for this export")
+    watermark = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When the exported data was read; delta exports from this export start here"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
 
@@ -513,6 +658,60 @@ class ExportLog(models.Model):
         ordering = ['-created_at']
 
 
+def export_upload_path(instance, filename):
+    # Unguessable path: export files hold customer data
+    return f"exports/{instance.user_id}/{uuid.uuid4().hex}/{filename}"
+
+
+class ExportJob(models.Model):
+    """An export built in the background by a Celery worker (see core.exports)."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs')
+    export_type = models.CharField(max_length=20, choices=ExportLog.EXPORT_TYPES)
+    data_type = models.CharField(max_length=20, choices=ExportLog.DATA_TYPES, default='vehicles')
+    columns = models.JSONField(default=list, help_text="Columns to include, in order")
+    filters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
+    record_count = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to=export_upload_path, blank=True)
+    file_size = models.PositiveIntegerField(null=True, blank=True, help_text="File size in bytes")
+    error = models.TextField(blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.data_type} {self.export_type} export for {self.user.username} ({self.status})"
+
+    class Meta:
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
+        ordering = ['-created_at']
+
+
+class ExportTombstone(models.Model):
+    """A deleted vehicle or bid, reported by delta exports (recorded by core.signals)."""
+    data_type = models.CharField(max_length=20, choices=ExportLog.DATA_TYPES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.data_type} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['data_type', 'deleted_at'], name='export_tombstone_since'),
+        ]
+
+
 # Static Pages Models
 
 class Inquiry(models.Model):
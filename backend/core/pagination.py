@@ -0,0 +1,139 @@
+# core/pagination.py
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Page-number pagination runs a COUNT(*) and an OFFSET that gets slower the
+deeper a client pages. Keyset pagination instead remembers the sort key and
+id of the last row served and asks for rows strictly after it, which is an
+index range scan at any depth. It is opt-in: clients send
+``?pagination=cursor`` and then follow ``next_cursor``.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """Paginate a queryset by a (sort field, id) pair."""
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=('-created_at', '-id'), page_size=None, nulls_last=False):
+        field, tiebreaker = ordering
+        if field.startswith('-') != tiebreaker.startswith('-'):
+            raise ValueError("Keyset ordering fields must share a direction")
+        self.ordering = ordering
+        self.descending = field.startswith('-')
+        self.field = field.lstrip('-')
+        self.tiebreaker = tiebreaker.lstrip('-')
+        # For a nullable sort field: rows without a value come last either way
+        self.nulls_last = nulls_last
+        if page_size:
+            self.page_size = page_size
+
+    def get_ordering(self):
+        """Arguments for order_by() matching the keyset order."""
+        if not self.nulls_last:
+            return self.ordering
+        if self.descending:
+            return (F(self.field).desc(nulls_last=True), self.ordering[1])
+        return (F(self.field).asc(nulls_last=True), self.ordering[1])
+
+    @classmethod
+    def requested(cls, request):
+        """Whether the client opted in to cursor pagination."""
+        return (
+            request.query_params.get(cls.mode_query_param) == 'cursor'
+            or cls.cursor_query_param in request.query_params
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+            return value, int(last_id)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, position):
+        """Filter selecting rows that sort strictly after the given position."""
+        value, last_id = position
+        op = 'lt' if self.descending else 'gt'
+        if value is None:
+            # Already into the trailing rows without a sort value
+            return Q(**{f'{self.field}__isnull': True, f'{self.tiebreaker}__{op}': last_id})
+        after = (
+            Q(**{f'{self.field}__{op}': value})
+            | Q(**{self.field: value, f'{self.tiebreaker}__{op}': last_id})
+        )
+        if self.nulls_last:
+            after |= Q(**{f'{self.field}__isnull': True})
+        return after
+
+    def paginate_queryset(self, queryset, request):
+        self.request = request
+        self.size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.get_ordering())
+        position = self.decode_cursor(request)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._after(position))
+            except (ValidationError, TypeError, ValueError):
+                # Decodable, but the value doesn't fit the sort field
+                raise NotFound(self.invalid_cursor_message)
+
+        # Fetch one extra row: its presence is the "has more" signal, no COUNT needed
+        rows = list(queryset[:self.size + 1])
+        self.has_more = len(rows) > self.size
+        rows = rows[:self.size]
+
+        self.next_cursor = None
+        if self.has_more:
+            last = rows[-1]
+            self.next_cursor = self.encode_cursor(
+                [getattr(last, self.field), getattr(last, self.tiebreaker)]
+            )
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.mode_query_param, 'cursor')
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            'has_more': self.has_more,
+            'next_cursor': self.next_cursor,
+            'next': self.get_next_link(),
+            'page_size': self.size,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
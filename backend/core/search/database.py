@@ -0,0 +1,143 @@
+# core/search/database.py
+"""
+PostgreSQL full-text search for when Elasticsearch is not available.
+
+Each vehicle stores a precomputed, weighted tsvector in ``search_vector``
+(GIN indexed), so a search is an index lookup instead of building a tsvector
+for every candidate row on each request. The vector is rebuilt from the
+Vehicle post_save signal whenever one of the searched fields changes.
+
+``fuzzy_search`` adds typo tolerance ("Toyta", "Hi-Lux") on top: every word
+of the query may instead match make, model or location by pg_trgm word
+similarity, which the trigram GIN indexes on those columns serve.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+SEARCH_CONFIG = 'english'
+
+# Same priorities as the Elasticsearch multi_match boosts: make/model hits
+# rank above description hits, which rank above location hits
+SEARCH_WEIGHTS = (
+    ('make', 'A'),
+    ('model', 'A'),
+    ('description', 'B'),
+    ('location', 'C'),
+)
+SEARCH_FIELDS = tuple(field for field, _ in SEARCH_WEIGHTS)
+
+
+def vehicle_search_vector():
+    """Expression computing a vehicle's weighted search vector."""
+    vector = None
+    for field, weight in SEARCH_WEIGHTS:
+        part = SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_vector(queryset):
+    """Recompute the stored search vector for every vehicle in queryset."""
+    return queryset.update(search_vector=vehicle_search_vector())
+
+
+def search_query(term):
+    # websearch syntax: quoted phrases, OR and -exclusions, never a syntax error
+    return SearchQuery(term, search_type='websearch', config=SEARCH_CONFIG)
+
+
+def full_text_search(queryset, term):
+    """Filter queryset to vehicles matching term, annotated with search_rank."""
+    query = search_query(term)
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    )
+
+
+# Short columns where typos are common and trigram indexes exist
+FUZZY_FIELDS = ('make', 'model', 'location')
+# Shorter words have too few trigrams to match meaningfully
+FUZZY_MIN_WORD_LENGTH = 3
+FUZZY_MAX_WORDS = 5
+
+
+def trigram_threshold(value=None):
+    """Word similarity threshold from a request override or the settings default."""
+    default = getattr(settings, 'SEARCH_TRIGRAM_THRESHOLD', 0.5)
+    try:
+        threshold = float(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        threshold = default
+    return min(max(threshold, 0.1), 1.0)
+
+
+def set_trigram_threshold(threshold):
+    """
+    Set the threshold used by the %> operator on this connection.
+
+    The operator (unlike a similarity() >= x filter) can use the trigram
+    indexes, but it reads its cut-off from a setting rather than an argument.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+            [str(threshold)],
+        )
+
+
+def fuzzy_words(term):
+    words = [w.lower() for w in re.findall(r'\w+', term) if len(w) >= FUZZY_MIN_WORD_LENGTH]
+    return words[:FUZZY_MAX_WORDS]
+
+
+def fuzzy_search(queryset, term, threshold=None):
+    """
+    Full-text matches plus vehicles whose make/model/location approximately
+    match every word of term. Annotates search_rank and similarity (0-1).
+    """
+    words = fuzzy_words(term)
+    if not words:
+        return full_text_search(queryset, term).annotate(similarity=F('search_rank'))
+
+    set_trigram_threshold(trigram_threshold(threshold))
+    query = search_query(term)
+    fuzzy = Q()
+    similarity = None
+    for word in words:
+        word_match = Q()
+        for field in FUZZY_FIELDS:
+            word_match |= Q(**{f'{field}__trigram_word_similar': word})
+        fuzzy &= word_match
+        # Greatest() skips NULLs, so a missing location doesn't void the score
+        best = Greatest(*(TrigramWordSimilarity(word, field) for field in FUZZY_FIELDS))
+        similarity = best if similarity is None else similarity + best
+
+    return queryset.filter(Q(search_vector=query) | fuzzy).annotate(
+        search_rank=SearchRank(F('search_vector'), query),
+        similarity=similarity / len(words),
+    )
+
+
+def fuzzy_suggestions(queryset, term, fields=('make', 'model'), limit=10, threshold=None):
+    """Distinct make/model values closest to term, best first."""
+    set_trigram_threshold(trigram_threshold(threshold))
+    scored = {}
+    for field in fields:
+        rows = (
+            queryset.filter(**{f'{field}__trigram_word_similar': term})
+            .annotate(similarity=TrigramWordSimilarity(term, field))
+            .order_by('-similarity')
+            .values_list(field, 'similarity')
+            .distinct()[:limit]
+        )
+        for value, score in rows:
+            if value and score > scored.get(value, -1):
+                scored[value] = score
+    return sorted(scored, key=scored.get, reverse=True)[:limit]
@@ -41,6 +41,7 @@ class VehicleDocument(Document):
     year = fields.IntegerField()
     vin = fields.KeywordField()
     mileage = fields.TextField()
+    mileage_km = fields.IntegerField()
     price = fields.FloatField()
     proposed_price = fields.FloatField()
     listing_type = fields.KeywordField()
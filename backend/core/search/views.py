@@ -8,6 +8,8 @@ from rest_framework import permissions, status
 from django.conf import settings
 import logging
 
+from .database import full_text_search, fuzzy_search, fuzzy_suggestions
+
 logger = logging.getLogger(__name__)
 
 # Check if Elasticsearch is available
@@ -27,6 +29,15 @@ class VehicleSearchView(APIView):
     """
     permission_classes = [permissions.AllowAny]
 
+    # sort_by values other than the default 'relevance': (field, order)
+    SORT_FIELDS = {
+        'newest': ('created_at', 'desc'),
+        'price_asc': ('price', 'asc'),
+        'price_desc': ('price', 'desc'),
+        'mileage_asc': ('mileage_km', 'asc'),
+        'mileage_desc': ('mileage_km', 'desc'),
+    }
+
     def get(self, request):
         query = request.query_params.get('q', '')
         make = request.query_params.get('make')
@@ -38,6 +49,10 @@ class VehicleSearchView(APIView):
         fuel_type = request.query_params.get('fuel_type')
         body_type = request.query_params.get('body_type')
         location = request.query_params.get('location')
+        # Ignored unless a whole number of km, as on the marketplace
+        min_mileage = self._mileage_param(request, 'min_mileage')
+        max_mileage = self._mileage_param(request, 'max_mileage')
+        sort_by = request.query_params.get('sort_by', 'relevance')
         page = int(request.query_params.get('page', 1))
         page_size = int(request.query_params.get('page_size', 12))
 
@@ -45,19 +60,27 @@ class VehicleSearchView(APIView):
             return self._elasticsearch_search(
                 query, make, model, min_year, max_year,
                 min_price, max_price, fuel_type, body_type,
-                location, page, page_size
+                location, page, page_size,
+                min_mileage=min_mileage, max_mileage=max_mileage, sort_by=sort_by
             )
         else:
             return self._database_search(
                 query, make, model, min_year, max_year,
                 min_price, max_price, fuel_type, body_type,
-                location, page, page_size
+                location, page, page_size,
+                min_mileage=min_mileage, max_mileage=max_mileage, sort_by=sort_by
             )
 
+    @staticmethod
+    def _mileage_param(request, name):
+        value = request.query_params.get(name, '').strip()
+        return int(value) if value.isdigit() else None
+
     def _elasticsearch_search(
         self, query, make, model, min_year, max_year,
         min_price, max_price, fuel_type, body_type,
-        location, page, page_size
+        location, page, page_size,
+        min_mileage=None, max_mileage=None, sort_by='relevance'
     ):
         """Perform search using Elasticsearch."""
         search = VehicleDocument.search()
@@ -95,6 +118,10 @@ class VehicleSearchView(APIView):
             filter_queries.append(Q('term', body_type=body_type))
         if location:
             filter_queries.append(Q('match', location=location))
+        if min_mileage is not None:
+            filter_queries.append(Q('range', mileage_km={'gte': min_mileage}))
+        if max_mileage is not None:
+            filter_queries.append(Q('range', mileage_km={'lte': max_mileage}))
 
         # Only show visible and verified vehicles
         filter_queries.append(Q('term', is_visible=True))
@@ -106,6 +133,11 @@ class VehicleSearchView(APIView):
         elif filter_queries:
             search = search.query('bool', filter=filter_queries)
 
+        # Sorting (relevance is the default score order)
+        if sort_by in self.SORT_FIELDS:
+            field, order = self.SORT_FIELDS[sort_by]
+            search = search.sort({field: {'order': order, 'missing': '_last'}})
+
         # Pagination
         start = (page - 1) * page_size
         search = search[start:start + page_size]
@@ -123,6 +155,7 @@ class VehicleSearchView(APIView):
                 'year': hit.year,
                 'price': hit.price,
                 'mileage': hit.mileage,
+                'mileage_km': getattr(hit, 'mileage_km', None),
                 'fuel_type': hit.fuel_type,
                 'body_type': hit.body_type,
                 'location': hit.location,
@@ -141,10 +174,11 @@ class VehicleSearchView(APIView):
     def _database_search(
         self, query, make, model, min_year, max_year,
         min_price, max_price, fuel_type, body_type,
-        location, page, page_size
+        location, page, page_size,
+        min_mileage=None, max_mileage=None, sort_by='relevance'
     ):
         """Fallback to database search when Elasticsearch is unavailable."""
-        from django.db.models import Q as DjangoQ
+        from django.db.models import F
         from core.models import Vehicle
         from core.serializers import VehicleListSerializer
 
@@ -153,14 +187,18 @@ class VehicleSearchView(APIView):
             verification_state='physical'
         ).select_related('owner')
 
-        # Full-text search
+        # Full-text search on the stored search vector, best matches first.
+        # Fuzzy mode (the default) also accepts near-misses on make/model/location;
+        # ?fuzzy=false turns it off and ?threshold=0.3 loosens it.
+        ordering = ['-created_at']
         if query:
-            queryset = queryset.filter(
-                DjangoQ(make__icontains=query) |
-                DjangoQ(model__icontains=query) |
-                DjangoQ(description__icontains=query) |
-                DjangoQ(location__icontains=query)
-            )
+            params = self.request.query_params
+            if params.get('fuzzy', 'true').lower() in ('0', 'false', 'no'):
+                queryset = full_text_search(queryset, query)
+                ordering = ['-search_rank', '-created_at']
+            else:
+                queryset = fuzzy_search(queryset, query, params.get('threshold'))
+                ordering = ['-search_rank', '-similarity', '-created_at']
 
         # Filters
         if make:
@@ -181,11 +219,19 @@ class VehicleSearchView(APIView):
             queryset = queryset.filter(body_type__iexact=body_type)
         if location:
             queryset = queryset.filter(location__icontains=location)
+        if min_mileage is not None:
+            queryset = queryset.filter(mileage_km__gte=min_mileage)
+        if max_mileage is not None:
+            queryset = queryset.filter(mileage_km__lte=max_mileage)
+        if sort_by in self.SORT_FIELDS:
+            field, order = self.SORT_FIELDS[sort_by]
+            expression = F(field).asc(nulls_last=True) if order == 'asc' else F(field).desc(nulls_last=True)
+            ordering = [expression, '-created_at']
 
         # Count and paginate
         total = queryset.count()
         start = (page - 1) * page_size
-        queryset = queryset.order_by('-created_at')[start:start + page_size]
+        queryset = queryset.order_by(*ordering)[start:start + page_size]
 
         serializer = VehicleListSerializer(queryset, many=True)
 
@@ -246,21 +292,11 @@ class VehicleAutocompleteView(APIView):
         return Response({'suggestions': list(suggestions)[:10]})
 
     def _database_autocomplete(self, query):
-        """Fallback autocomplete using database."""
+        """Fallback autocomplete using trigram similarity, so typos still match."""
         from core.models import Vehicle
 
-        # Get distinct makes and models matching query
-        makes = Vehicle.objects.filter(
-            make__icontains=query,
-            is_visible=True,
-            verification_state='physical'
-        ).values_list('make', flat=True).distinct()[:5]
-
-        models = Vehicle.objects.filter(
-            model__icontains=query,
-            is_visible=True,
-            verification_state='physical'
-        ).values_list('model', flat=True).distinct()[:5]
-
-        suggestions = list(set(list(makes) + list(models)))[:10]
+        live = Vehicle.objects.filter(is_visible=True, verification_state='physical')
+        suggestions = fuzzy_suggestions(
+            live, query, limit=10, threshold=self.request.query_params.get('threshold')
+        )
         return Response({'suggestions': suggestions})
@@ -4,6 +4,7 @@ from .models import QuoteRequest, Vehicle, VehicleImage, Bid, Profile, User, Veh
 from django.db.models import Q
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.files.storage import default_storage
 import logging
 logger = logging.getLogger(__name__)
 
@@ -93,7 +94,7 @@ class VehicleImageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = VehicleImage
-        fields = ['image']
+        fields = ['id', 'image', 'position']
     
 class VehicleSerializer(serializers.ModelSerializer):
     images = VehicleImageSerializer(many=True, read_only=True)
@@ -106,7 +107,7 @@ class VehicleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Vehicle
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['verification_state', 'is_visible']
         extra_kwargs = {
             'vin': {'required': True},
@@ -156,23 +157,27 @@ class VehicleSerializer(serializers.ModelSerializer):
     
 class VehicleListSerializer(serializers.ModelSerializer):
     main_image = serializers.SerializerMethodField()
+    main_thumbnail = serializers.SerializerMethodField()
     owner_username = serializers.CharField(source='owner.username')
 
     class Meta:
         model = Vehicle
-        fields = ('id', 'make', 'model', 'year', 'price','body_type', 'mileage','fuel_type',
-                 'location', 'created_at', 'main_image', 'owner_username')
+        fields = ('id', 'make', 'model', 'year', 'price','body_type', 'mileage', 'mileage_km', 'fuel_type',
+                 'location', 'created_at', 'main_image', 'main_thumbnail', 'owner_username')
 
+    # Built from the denormalized names on Vehicle through the configured
+    # storage, like ImageField.url: no image rows are loaded
     def get_main_image(self, obj):
-        images = obj.images.all()
-        if images:
-            first_image = images[0].image
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(first_image.url)
-            return first_image.url
+        if obj.primary_image:
+            return default_storage.url(obj.primary_image)
         return None
 
+    def get_main_thumbnail(self, obj):
+        if obj.primary_thumbnail:
+            return default_storage.url(obj.primary_thumbnail)
+        # Thumbnail not generated yet; fall back to the full image
+        return self.get_main_image(obj)
+
 class VehicleVerificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vehicle
@@ -6,20 +6,154 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.utils.html import strip_tags
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import post_save, post_delete
-from django.core.cache import cache
-from .models import Vehicle
+import logging
+from .models import Vehicle, VehicleImage
+from .tasks import queue_primary_thumbnail
+from .caching import marketplace_cache
+from .facets import facet_index
+from .search.database import SEARCH_FIELDS, update_search_vector
+from .analytics.counters import dashboard_counters
+from .analytics.trending import BID_WEIGHT, trending_index
+from .models import ExportTombstone, WebsiteVisit
+from collections import Counter
+
+logger = logging.getLogger(__name__)
 
 @receiver([post_save, post_delete], sender=Vehicle)
 def increment_marketplace_cache_version(sender, instance, **kwargs):
     try:
-        # Increment cache version to bust all marketplace caches
-        version = cache.get('marketplace_cache_version', 1)
-        cache.set('marketplace_cache_version', version + 1)
-    except:
+        # Bump only the scopes (global + this vehicle's make/body type, old
+        # and new) whose cached pages could contain this vehicle
+        previous = {}
+        if kwargs.get('signal') is post_save and not kwargs.get('created'):
+            previous = {
+                field: instance.tracker.previous(field)
+                for field in marketplace_cache.DIMENSIONS
+            }
+        marketplace_cache.invalidate_vehicle(instance, previous)
+    except Exception as e:
         # Fallback in case cache is unavailable
-        pass
+        logger.warning(f"Failed to invalidate marketplace cache for vehicle {instance.pk}: {e}")
+
+@receiver([post_save, post_delete], sender=VehicleImage)
+def sync_primary_image(sender, instance, **kwargs):
+    vehicle_id = instance.vehicle_id
+    origin = kwargs.get('origin')
+    if vehicle_id is None or isinstance(origin, Vehicle) or getattr(origin, 'model', None) is Vehicle:
+        # No vehicle, or the image is going away together with its vehicle
+        return
+    vehicle = Vehicle.objects.filter(pk=vehicle_id).first()
+    if vehicle is None:
+        return
+    if vehicle.refresh_primary_image():
+        marketplace_cache.invalidate_vehicle(vehicle)
+        if vehicle.primary_image:
+            transaction.on_commit(lambda: queue_primary_thumbnail(vehicle_id))
+    else:
+        # The image list is part of the detail payload either way
+        vehicle.touch()
+
+@receiver(post_save, sender=Vehicle)
+def update_facet_index(sender, instance, **kwargs):
+    # Patch the vehicle's facet entry once the write is visible to readers
+    transaction.on_commit(lambda: facet_index.update_vehicle(instance))
+
+@receiver(post_save, sender=Vehicle)
+def sync_search_vector(sender, instance, created, **kwargs):
+    # Only recompute when a searched field changed; a queryset update keeps
+    # this from re-triggering the save signals
+    if not created and not any(instance.tracker.has_changed(field) for field in SEARCH_FIELDS):
+        return
+    try:
+        update_search_vector(Vehicle.objects.filter(pk=instance.pk))
+    except Exception as e:
+        logger.warning(f"Failed to update search vector for vehicle {instance.pk}: {e}")
+
+@receiver(post_delete, sender=Vehicle)
+def remove_from_facet_index(sender, instance, **kwargs):
+    vehicle_id = instance.pk
+    transaction.on_commit(lambda: facet_index.remove_vehicle(vehicle_id))
+
+# Live dashboard counters (core.analytics.counters), applied once the change
+# is committed so rolled-back writes are never counted
+VEHICLE_STATE_COUNTERS = {
+    'pending': 'pending_vehicles',
+    'physical': 'verified_vehicles',
+    'rejected': 'rejected_vehicles',
+}
+
+def _count_on_commit(deltas):
+    if deltas:
+        transaction.on_commit(lambda: dashboard_counters.apply(deltas))
+
+@receiver([post_save, post_delete], sender=Vehicle)
+def count_dashboard_vehicles(sender, instance, **kwargs):
+    deltas = Counter()
+    state = VEHICLE_STATE_COUNTERS.get(instance.verification_state)
+    if kwargs.get('signal') is post_delete:
+        deltas['total_vehicles'] -= 1
+        if state:
+            deltas[state] -= 1
+    elif kwargs.get('created'):
+        deltas['total_vehicles'] += 1
+        if state:
+            deltas[state] += 1
+    elif instance.tracker.has_changed('verification_state'):
+        previous = VEHICLE_STATE_COUNTERS.get(instance.tracker.previous('verification_state'))
+        if previous:
+            deltas[previous] -= 1
+        if state:
+            deltas[state] += 1
+    _count_on_commit(deltas)
+
+@receiver([post_save, post_delete], sender=Bid)
+def count_dashboard_bids(sender, instance, **kwargs):
+    deltas = Counter()
+    pending = instance.status == 'pending'
+    if kwargs.get('signal') is post_delete:
+        deltas['total_bids'] -= 1
+        deltas['pending_bids'] -= pending
+    elif kwargs.get('created'):
+        deltas['total_bids'] += 1
+        deltas['pending_bids'] += pending
+    elif instance.tracker.has_changed('status'):
+        deltas['pending_bids'] += pending - (instance.tracker.previous('status') == 'pending')
+    _count_on_commit(deltas)
+
+@receiver([post_save, post_delete], sender=User)
+def count_dashboard_users(sender, instance, **kwargs):
+    # is_active toggles aren't tracked; the periodic re-seed picks them up
+    if kwargs.get('signal') is post_delete:
+        _count_on_commit({'total_users': -1, 'active_users': -int(instance.is_active)})
+    elif kwargs.get('created'):
+        _count_on_commit({'total_users': 1, 'active_users': int(instance.is_active)})
+
+@receiver(post_save, sender=WebsiteVisit)
+def count_dashboard_visits(sender, instance, created, **kwargs):
+    if created and "/marketplace" in instance.path:
+        _count_on_commit({'marketplace_visits': 1})
+
+# Trending leaderboard (core.analytics.trending); views arrive via the view buffer
+@receiver(post_save, sender=Bid)
+def boost_trending_on_bid(sender, instance, created, **kwargs):
+    if created:
+        vehicle_id = instance.vehicle_id
+        transaction.on_commit(lambda: trending_index.record(vehicle_id, BID_WEIGHT))
+
+@receiver(post_delete, sender=Vehicle)
+def remove_from_trending(sender, instance, **kwargs):
+    vehicle_id = instance.pk
+    transaction.on_commit(lambda: trending_index.remove(vehicle_id))
+
+# Tombstones for delta exports (core.exports); written in the deleting transaction
+EXPORT_DATA_TYPES = {Vehicle: 'vehicles', Bid: 'bids'}
+
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=Bid)
+def record_export_tombstone(sender, instance, **kwargs):
+    ExportTombstone.objects.create(data_type=EXPORT_DATA_TYPES[sender], object_id=instance.pk)
 
 @receiver(post_save, sender=Vehicle)
 def handle_new_vehicle(sender, instance, created, **kwargs):
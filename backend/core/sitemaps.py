@@ -1,6 +1,6 @@
 # vehicles/sitemaps.py
 from django.contrib.sitemaps import Sitemap
-from .models import Vehicle
+from .models import PUBLIC_VEHICLE, Vehicle
 
 class VehicleSitemap(Sitemap):
     # How often the page is expected to change
@@ -10,10 +10,7 @@ class VehicleSitemap(Sitemap):
 
     def items(self):
         # Only index vehicles that are live on the marketplace
-        return Vehicle.objects.filter(
-            verification_state="physical", 
-            is_visible=True
-        ).order_by('-created_at')
+        return Vehicle.objects.filter(PUBLIC_VEHICLE).order_by('-created_at')
 
     def lastmod(self, obj):
         # Tells Google when the car listing was last updated
@@ -3,9 +3,21 @@ from celery import shared_task
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
+from django.utils import timezone
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from io import BytesIO
+from PIL import Image, ImageOps
+import logging
+import os
 from .models import Vehicle
 
+logger = logging.getLogger(__name__)
+
+# Bounding box for list/card thumbnails
+THUMBNAIL_SIZE = (480, 360)
+
 @shared_task(bind=True, max_retries=3)
 def send_vehicle_approved_email(self, vehicle_id, verification_type=None):  # Add parameter here
     try:
@@ -44,4 +56,109 @@ def send_vehicle_rejected_email(self, vehicle_id, reason):
             fail_silently=False
         )
     except Vehicle.DoesNotExist as exc:
-        self.retry(exc=exc, countdown=60)
\ No newline at end of file
+        self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def generate_primary_thumbnail(self, vehicle_id):
+    """Render a JPEG thumbnail of the vehicle's primary image and store its name."""
+    try:
+        vehicle = Vehicle.objects.only('id', 'primary_image').get(id=vehicle_id)
+    except Vehicle.DoesNotExist:
+        return
+    source = vehicle.primary_image
+    if not source:
+        return
+
+    try:
+        with default_storage.open(source) as image_file:
+            image = ImageOps.exif_transpose(Image.open(image_file))
+            image = image.convert('RGB')
+            image.thumbnail(THUMBNAIL_SIZE)
+            output = BytesIO()
+            image.save(output, format='JPEG', quality=80, optimize=True)
+    except (OSError, ValueError) as exc:
+        logger.warning(f"Thumbnail generation failed for vehicle {vehicle_id}: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+
+    base_name = os.path.splitext(os.path.basename(source))[0]
+    thumbnail_name = default_storage.save(
+        f"vehicle_images/thumbnails/{base_name}.jpg", ContentFile(output.getvalue())
+    )
+    # Only apply if the primary image hasn't changed while we were working
+    updated = Vehicle.objects.filter(id=vehicle_id, primary_image=source).update(
+        primary_thumbnail=thumbnail_name, updated_at=timezone.now()
+    )
+    if updated:
+        from .caching import marketplace_cache
+        marketplace_cache.invalidate_vehicle(Vehicle.objects.get(id=vehicle_id))
+
+
+def queue_primary_thumbnail(vehicle_id):
+    """Queue thumbnail generation without failing the caller if the broker is down."""
+    try:
+        generate_primary_thumbnail.delay(vehicle_id)
+    except Exception as e:
+        logger.warning(f"Could not queue thumbnail for vehicle {vehicle_id}: {e}")
+
+
+@shared_task
+def flush_vehicle_views():
+    """Persist buffered vehicle view events (scheduled by Celery beat)."""
+    from .analytics.tracking import view_buffer
+    written = view_buffer.flush()
+    if written:
+        logger.info(f"Flushed {written} buffered vehicle views")
+    return written
+
+
+@shared_task
+def rollup_daily_analytics():
+    """Refresh the daily analytics rollups (scheduled by Celery beat)."""
+    from .analytics.rollups import rollup_recent
+    written = rollup_recent()
+    logger.info(f"Rolled up daily analytics: {written}")
+    return written
+
+
+@shared_task
+def manage_analytics_partitions():
+    """Keep the analytics event partitions ahead of time and within retention (scheduled by Celery beat)."""
+    from .analytics.partitions import manage_partitions
+    summary = manage_partitions()
+    logger.info(f"Analytics partition maintenance: {summary}")
+    return summary
+
+
+@shared_task
+def push_dashboard_counters():
+    """Send the coalesced live dashboard counters to connected admins."""
+    from .analytics.counters import dashboard_counters
+    return dashboard_counters.push()
+
+
+@shared_task
+def maintain_trending_index():
+    """Rebase and trim the trending leaderboard (scheduled by Celery beat)."""
+    from .analytics.trending import trending_index
+    return trending_index.maintain()
+
+
+@shared_task
+def process_export_job(job_id):
+    """Build a queued export job's file in the background."""
+    from .exports import run_export_job
+    job = run_export_job(job_id)
+    return job.status
+
+
+def queue_export_job(job_id):
+    """Queue an export job, failing the job instead of the caller if the broker is down."""
+    try:
+        process_export_job.delay(job_id)
+    except Exception as e:
+        from .models import ExportJob
+        logger.warning(f"Could not queue export job {job_id}: {e}")
+        ExportJob.objects.filter(pk=job_id).update(
+            status='failed', error='Could not queue export', finished_at=timezone.now()
+        )
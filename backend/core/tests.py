@@ -1,3 +1,677 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+from django.test import RequestFactory, TestCase, override_settings
+
+# Redis on a port nothing listens on, with the production IGNORE_EXCEPTIONS
+# option: every cache call fails and returns None instead of raising
+UNAVAILABLE_CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:1/0',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'IGNORE_EXCEPTIONS': True,
+            'SOCKET_CONNECT_TIMEOUT': 0.1,
+        },
+    }
+}
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+def make_user(username, **fields):
+    from django.contrib.auth.models import User
+    return User.objects.create(username=username, email=f"{username}@example.com", **fields)
+
+
+def make_vehicle(owner, **fields):
+    from .models import Vehicle
+    values = {
+        'make': 'Toyota',
+        'model': 'Corolla',
+        'year': 2015,
+        'mileage': '85,000 km',
+        'vin': f"VIN{Vehicle.objects.count()}{owner.pk}",
+        'listing_type': 'marketplace',
+        'price': 10000,
+        'verification_state': 'physical',
+    }
+    values.update(fields)
+    return Vehicle.objects.create(owner=owner, **values)
+
+
+BROWSER_HEADERS = {
+    'HTTP_USER_AGENT': 'Mozilla/5.0 (X11; Linux x86_64) Firefox/120.0',
+    'HTTP_ACCEPT_LANGUAGE': 'en',
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TrafficFilterTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import AnonymousUser
+        from django.core.cache import cache
+        cache.clear()
+        self.factory = RequestFactory()
+        self.anonymous = AnonymousUser()
+
+    def _request(self, **headers):
+        request = self.factory.get('/', **headers)
+        request.user = self.anonymous
+        return request
+
+    def test_crawler_is_dropped(self):
+        from .analytics.bots import traffic_filter
+        request = self._request(HTTP_USER_AGENT='Googlebot/2.1')
+        self.assertEqual(traffic_filter.classify(request, '10.0.0.1'), 'bot')
+        self.assertFalse(traffic_filter.should_record(request, '10.0.0.1'))
+
+    def test_rate_limit(self):
+        from .analytics.bots import IP_RATE_LIMIT, traffic_filter
+        verdicts = [
+            traffic_filter.classify(self._request(**BROWSER_HEADERS), '10.0.0.2')
+            for _ in range(IP_RATE_LIMIT + 1)
+        ]
+        self.assertEqual(verdicts[:IP_RATE_LIMIT], ['human'] * IP_RATE_LIMIT)
+        self.assertEqual(verdicts[-1], 'rate_limited')
+
+    @override_settings(CACHES=UNAVAILABLE_CACHES)
+    def test_unavailable_cache_records_humans(self):
+        from .analytics.bots import traffic_filter
+        request = self._request(**BROWSER_HEADERS)
+        self.assertEqual(traffic_filter.classify(request, '10.0.0.3'), 'human')
+        self.assertTrue(traffic_filter.should_record(request, '10.0.0.3'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VersionedCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from .caching import MarketplaceCache
+        cache.clear()
+        self.cache = MarketplaceCache('test_marketplace', timeout=60, stale_timeout=60, fill_wait=2.0)
+
+    def test_bump_changes_only_affected_scopes(self):
+        toyota = self.cache.key_for({'make': 'Toyota'})
+        bmw = self.cache.key_for({'make': 'BMW'})
+        self.cache.bump('make:toyota')
+        self.assertNotEqual(self.cache.key_for({'make': 'Toyota'}), toyota)
+        self.assertEqual(self.cache.key_for({'make': 'BMW'}), bmw)
+
+    def test_get_or_compute_caches_until_bumped(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        key = self.cache.key_for({'make': 'Toyota'})
+        self.assertEqual(self.cache.get_or_compute(key, compute), 1)
+        self.assertEqual(self.cache.get_or_compute(key, compute), 1)
+        self.cache.bump('make:toyota')
+        self.assertEqual(self.cache.get_or_compute(self.cache.key_for({'make': 'Toyota'}), compute), 2)
+
+    def test_stale_entry_served_when_refresh_fails(self):
+        key = self.cache.key_for({})
+        self.cache.get_or_compute(key, lambda: 'old', timeout=-1)
+
+        def broken():
+            raise RuntimeError("database unavailable")
+
+        self.assertEqual(self.cache.get_or_compute(key, broken), 'old')
+
+    @override_settings(CACHES=UNAVAILABLE_CACHES)
+    def test_unavailable_cache_computes_without_waiting(self):
+        import time
+        self.assertIsNone(self.cache.key_for({'make': 'Toyota'}))
+        started = time.monotonic()
+        self.assertEqual(self.cache.get_or_compute(None, lambda: 'fresh'), 'fresh')
+        self.assertEqual(self.cache.get_or_compute('detail:1', lambda: 'fresh'), 'fresh')
+        self.assertLess(time.monotonic() - started, self.cache.fill_wait / 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VehicleAdminActionTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.admin = make_user('admin', is_staff=True, is_superuser=True)
+        self.client.force_login(self.admin)
+
+    def _run_action(self, action, vehicles):
+        from django.urls import reverse
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:core_vehicle_changelist'), {
+                'action': action,
+                '_selected_action': [v.pk for v in vehicles],
+            })
+
+    def test_bulk_approval_invalidates_marketplace_and_stamps_updated_at(self):
+        from .caching import marketplace_cache
+        vehicle = make_vehicle(self.admin, verification_state='pending', make='Honda')
+        before = vehicle.updated_at
+        versions = {scope: marketplace_cache.get_version(scope) for scope in ('all', 'make:honda')}
+
+        self._run_action('approve_physical', [vehicle])
+
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.verification_state, 'physical')
+        self.assertGreater(vehicle.updated_at, before)
+        for scope, version in versions.items():
+            self.assertNotEqual(marketplace_cache.get_version(scope), version)
+
+
+    def test_bulk_rejection_drops_vehicle_from_facets(self):
+        from .facets import facet_index
+        vehicle = make_vehicle(self.admin, make='Honda', rejection_reason='')
+        self.assertEqual(facet_index.counts({'make': 'honda'})['total'], 1)
+
+        self._run_action('reject_vehicles', [vehicle])
+
+        self.assertEqual(facet_index.counts({'make': 'honda'})['total'], 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class FacetIndexTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.owner = make_user('seller')
+        self.corolla = make_vehicle(self.owner, price=4000, body_type='Sedan')
+        make_vehicle(self.owner, model='Hilux', year=2019, price=30000, body_type='Pickup')
+        make_vehicle(self.owner, make='BMW', model='X5', year=2019, price=30000, body_type='SUV')
+        make_vehicle(self.owner, make='BMW', verification_state='pending')
+
+    def counts(self, **params):
+        from .facets import facet_index
+        return facet_index.counts(params)
+
+    @staticmethod
+    def values(facets, dimension):
+        return {item['value']: item['count'] for item in facets[dimension]}
+
+    def test_unfiltered_counts(self):
+        result = self.counts()
+        self.assertEqual(result['total'], 3)
+        self.assertEqual(self.values(result['facets'], 'make'), {'Toyota': 2, 'BMW': 1})
+        self.assertEqual(self.values(result['facets'], 'year'), {2019: 2, 2015: 1})
+        self.assertEqual(
+            [(b['min'], b['count']) for b in result['facets']['price']],
+            [(0, 1), (20000, 2)],
+        )
+
+    def test_each_dimension_counts_over_the_other_filters(self):
+        result = self.counts(make='toyota', year='2019')
+        self.assertEqual(result['total'], 1)
+        # Alternatives to the selected make among 2019 listings, and vice versa
+        self.assertEqual(self.values(result['facets'], 'make'), {'Toyota': 1, 'BMW': 1})
+        self.assertEqual(self.values(result['facets'], 'year'), {2019: 1, 2015: 1})
+        self.assertEqual(self.values(result['facets'], 'body_type'), {'Pickup': 1})
+
+    def test_price_range_filter(self):
+        result = self.counts(minPrice='4500', maxPrice='30000')
+        self.assertEqual(result['total'], 2)
+        self.assertEqual(self.values(result['facets'], 'model'), {'Hilux': 1, 'X5': 1})
+
+    def test_saves_and_deletes_patch_the_index(self):
+        self.assertEqual(self.counts()['total'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_vehicle(self.owner, make='Mazda', price=8000)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.corolla.make = 'Nissan'
+            self.corolla.save()
+        result = self.counts()
+        self.assertEqual(result['total'], 4)
+        self.assertEqual(self.values(result['facets'], 'make'), {'Toyota': 1, 'BMW': 1, 'Mazda': 1, 'Nissan': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.corolla.delete()
+        result = self.counts()
+        self.assertEqual(result['total'], 3)
+        self.assertNotIn('Nissan', self.values(result['facets'], 'make'))
+
+    @override_settings(CACHES=UNAVAILABLE_CACHES)
+    def test_unavailable_cache_patches_fail_fast(self):
+        import time
+        from .facets import facet_index
+        started = time.monotonic()
+        facet_index.remove_vehicle(self.corolla.pk)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.counts()['total'], 3)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.owner = make_user('seller')
+        self.priced = [make_vehicle(self.owner, price=price) for price in (5000, 7000, 7000, 9000)]
+        # Instant sale listings carry a proposed price and no marketplace price
+        self.unpriced = [
+            make_vehicle(self.owner, listing_type='instant_sale', price=None, proposed_price=1000)
+            for _ in range(2)
+        ]
+
+    def walk(self, ordering, page_size=2):
+        from rest_framework.request import Request
+        from .models import Vehicle
+        from .pagination import KeysetPagination
+        seen, cursor = [], None
+        while True:
+            params = {'cursor': cursor} if cursor else {'pagination': 'cursor'}
+            paginator = KeysetPagination(ordering=ordering, page_size=page_size, nulls_last=True)
+            request = Request(RequestFactory().get('/', params))
+            seen += [v.pk for v in paginator.paginate_queryset(Vehicle.objects.all(), request)]
+            cursor = paginator.next_cursor
+            if not cursor:
+                return seen
+
+    def test_null_sort_values_come_last_in_both_directions(self):
+        unpriced = sorted(v.pk for v in self.unpriced)
+        ascending = self.walk(('price', 'id'))
+        self.assertEqual(ascending, [v.pk for v in self.priced] + unpriced)
+        descending = self.walk(('-price', '-id'))
+        self.assertEqual(descending, [v.pk for v in reversed(self.priced)] + unpriced[::-1])
+
+    def test_malformed_cursors_are_not_found(self):
+        import base64
+        import json
+        url = '/core/marketplace/'
+        wrong_type = base64.urlsafe_b64encode(json.dumps(['cheap', 1]).encode()).decode()
+        for cursor in ('not-base64!', wrong_type):
+            response = self.client.get(url, {'sortBy': 'priceLowHigh', 'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+        response = self.client.get(url, {'cursor': wrong_type})
+        self.assertEqual(response.status_code, 404)
+
+    def test_marketplace_cursor_pages_cover_every_listing(self):
+        seen, params = [], {'sortBy': 'priceHighLow', 'pagination': 'cursor', 'page_size': 3}
+        while True:
+            data = self.client.get('/core/marketplace/', params).json()
+            seen += [item['id'] for item in data['results']]
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+        self.assertEqual(seen, [v.pk for v in reversed(self.priced)])
+
+
+class MarketplaceETagTests(TestCase):
+    url = '/core/marketplace/'
+
+    def setUp(self):
+        make_vehicle(make_user('seller'))
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_etag_revalidates_until_scope_is_bumped(self):
+        from .caching import marketplace_cache
+        etag = self.client.get(self.url, {'make': 'Toyota'})['ETag']
+        self.assertEqual(self.client.get(self.url, {'make': 'Toyota'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        marketplace_cache.bump('make:toyota')
+        self.assertEqual(self.client.get(self.url, {'make': 'Toyota'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(CACHES=UNAVAILABLE_CACHES)
+    def test_no_etag_while_cache_unavailable(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class TrackVehicleViewTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from .analytics.tracking import view_buffer
+        cache.clear()
+        view_buffer._local.clear()
+        self.vehicle = make_vehicle(make_user('seller'), view_count=7)
+        self.url = f'/core/vehicles/{self.vehicle.pk}/track_view/'
+
+    def tearDown(self):
+        from .analytics.tracking import view_buffer
+        view_buffer._local.clear()
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_unknown_vehicle_is_not_found(self):
+        response = self.client.post(f'/core/vehicles/{self.vehicle.pk + 1}/track_view/', **BROWSER_HEADERS)
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_repeat_view_is_deduped(self):
+        first = self.client.post(self.url, **BROWSER_HEADERS)
+        self.assertEqual((first.status_code, first.json()['view_count']), (201, 8))
+        second = self.client.post(self.url, **BROWSER_HEADERS)
+        self.assertEqual((second.status_code, second.json()['view_count']), (200, 7))
+
+    @override_settings(CACHES=UNAVAILABLE_CACHES)
+    def test_views_are_kept_while_cache_unavailable(self):
+        from .analytics.tracking import view_buffer
+        from .models import VehicleView
+        for _ in range(2):
+            self.assertEqual(self.client.post(self.url, **BROWSER_HEADERS).status_code, 201)
+        self.assertEqual(view_buffer.flush(), 2)
+        self.assertEqual(VehicleView.objects.filter(vehicle=self.vehicle).count(), 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SearchMileageFilterTests(TestCase):
+    url = '/core/search/'
+
+    def setUp(self):
+        owner = make_user('seller')
+        self.low = make_vehicle(owner, mileage='40,000 km')
+        self.high = make_vehicle(owner, mileage='120,000 km')
+
+    def search(self, **params):
+        from unittest import mock
+        with mock.patch('core.search.views.ELASTICSEARCH_ENABLED', False):
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['id'] for item in response.json()['results'])
+
+    def test_database_search_filters_on_parsed_mileage(self):
+        self.assertEqual(self.search(min_mileage='100000'), [self.high.pk])
+        self.assertEqual(self.search(max_mileage='0'), [])
+
+    def test_malformed_mileage_is_ignored(self):
+        everything = sorted([self.low.pk, self.high.pk])
+        self.assertEqual(self.search(min_mileage='lots'), everything)
+        self.assertEqual(self.search(max_mileage='50k'), everything)
+
+    def test_elasticsearch_search_gets_integers(self):
+        from unittest import mock
+        from rest_framework.response import Response
+        from .search.views import VehicleSearchView
+        with mock.patch('core.search.views.ELASTICSEARCH_ENABLED', True), \
+                mock.patch.object(VehicleSearchView, '_elasticsearch_search', return_value=Response({})) as search:
+            self.client.get(self.url, {'min_mileage': '5000', 'max_mileage': 'abc'})
+        self.assertEqual(search.call_args.kwargs['min_mileage'], 5000)
+        self.assertIsNone(search.call_args.kwargs['max_mileage'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DeltaExportTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from django.utils import timezone
+        from .models import ExportLog
+        cache.clear()
+        self.admin = make_user('admin', is_staff=True, is_superuser=True)
+        self.unchanged = make_vehicle(self.admin)
+        self.approved = make_vehicle(self.admin, verification_state='pending')
+        self.edited = make_vehicle(self.admin)
+        self.deleted = make_vehicle(self.admin)
+        self.log = ExportLog.objects.create(
+            user=self.admin, export_type='csv', data_type='vehicles', record_count=4,
+            watermark=timezone.now(),
+        )
+
+    def _delta(self):
+        from .exports import ExportService
+        rows, headers, count = ExportService.prepare_export(
+            'vehicles', ['make', 'verification_state'], {'since_export': self.log.id}
+        )
+        rows = list(rows)
+        self.assertEqual(count, len(rows))
+        self.assertEqual(headers, ['Change', 'ID', 'Make', 'Status'])
+        return {(row[0], row[1]) for row in rows}
+
+    def test_changes_bulk_updates_and_deletions_since_watermark(self):
+        from django.urls import reverse
+        self.client.force_login(self.admin)
+        self.client.post(reverse('admin:core_vehicle_changelist'), {
+            'action': 'approve_physical', '_selected_action': [self.approved.pk],
+        })
+        self.edited.price = 12000
+        self.edited.save(update_fields=['price'])
+        deleted_id = self.deleted.pk
+        self.deleted.delete()
+
+        self.assertEqual(self._delta(), {
+            ('changed', self.approved.pk),
+            ('changed', self.edited.pk),
+            ('deleted', deleted_id),
+        })
+
+    def test_latest_resolves_to_users_most_recent_export(self):
+        from .exports import ExportService
+        self.assertEqual(ExportService.resolve_since_export('vehicles', 'latest', self.admin), self.log.id)
+        with self.assertRaises(ValueError):
+            ExportService.resolve_since_export('users', 'latest', self.admin)
+
+
+class MileageParserTests(TestCase):
+    def test_readings(self):
+        from .mileage import parse_mileage
+        cases = {
+            '120,000 km': 120000,
+            '120 000kms': 120000,
+            '120.000': 120000,
+            '85000': 85000,
+            '75k km': 75000,
+            '75 thousand': 75000,
+            '10,000 miles': 16093,
+            '62k mi': 99779,
+            '12.5k': 12500,
+            'Mileage: 45,300 km (one owner)': 45300,
+        }
+        for text, km in cases.items():
+            self.assertEqual(parse_mileage(text), km, text)
+
+    def test_unusable_readings(self):
+        from .mileage import parse_mileage
+        for text in (None, '', 'unknown', 'low', '99999999 km'):
+            self.assertIsNone(parse_mileage(text), text)
+
+    def test_saved_on_the_vehicle(self):
+        vehicle = make_vehicle(make_user('seller'), mileage='30k miles')
+        self.assertEqual(vehicle.mileage_km, 48280)
+        vehicle.mileage = 'not sure'
+        vehicle.save(update_fields=['mileage'])
+        vehicle.refresh_from_db()
+        self.assertIsNone(vehicle.mileage_km)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryCountTests(TestCase):
+    """Read paths must not grow queries with the number of listings."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.vehicles = [
+            make_vehicle(make_user(f'seller{i}'), make=make)
+            for i, make in enumerate(('Toyota', 'Honda', 'BMW', 'Toyota', 'Mazda'))
+        ]
+
+    def test_marketplace_page(self):
+        with self.assertNumQueries(2):
+            # COUNT(*) and the page
+            self.client.get('/core/marketplace/', {'sortBy': 'priceLowHigh'})
+        with self.assertNumQueries(0):
+            self.client.get('/core/marketplace/', {'sortBy': 'priceLowHigh'})
+
+    def test_marketplace_cursor_page(self):
+        with self.assertNumQueries(1):
+            self.client.get('/core/marketplace/', {'pagination': 'cursor', 'sortBy': 'mileageHighLow'})
+
+    def test_marketplace_facets(self):
+        with self.assertNumQueries(1):
+            self.client.get('/core/marketplace/facets/')
+        with self.assertNumQueries(0):
+            self.client.get('/core/marketplace/facets/', {'make': 'toyota'})
+
+    def test_vehicle_detail(self):
+        url = f'/core/all-vehicles/{self.vehicles[0].pk}/'
+        with self.assertNumQueries(3):
+            # updated_at, then the vehicle with its owner and its images
+            etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_track_view(self):
+        with self.assertNumQueries(1):
+            self.client.post(f'/core/vehicles/{self.vehicles[0].pk}/track_view/', **BROWSER_HEADERS)
+
+    def test_vehicle_id_list(self):
+        from rest_framework.test import APIRequestFactory
+        from .views import vehicle_id_list
+        with self.assertNumQueries(1):
+            response = vehicle_id_list(APIRequestFactory().get('/core/vehicles/id-list/'))
+        self.assertEqual(len(response.data), len(self.vehicles))
+
+    def test_sitemap(self):
+        from django.contrib.sites.models import Site
+        Site.objects.get_current()
+        with self.assertNumQueries(2):
+            self.client.get('/sitemap.xml')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ExportWriterTests(TestCase):
+    columns = ['id', 'make', 'price', 'mileage', 'is_visible', 'owner__username', 'created_at']
+
+    def setUp(self):
+        owner = make_user('seller')
+        self.vehicles = [
+            make_vehicle(owner, make='Toyota', price=12500),
+            make_vehicle(owner, make='Honda', listing_type='instant_sale', price=None, proposed_price=900),
+        ]
+
+    def export(self, export_type, columnar=False):
+        from .exports import ExportService
+        rows, headers, count = ExportService.prepare_export('vehicles', self.columns, {}, columnar=columnar)
+        output = io.BytesIO()
+        written = ExportService.write(export_type, output, rows, headers, title="Vehicles")
+        self.assertEqual(written, count)
+        return output.getvalue()
+
+    def test_rows_are_formatted(self):
+        from .exports import ExportService
+        queryset = ExportService.build_queryset('vehicles', {})
+        honda = self.vehicles[1]
+        rows = {row[0]: row for row in ExportService.iter_rows(queryset, self.columns)}
+        self.assertEqual(
+            rows[honda.pk],
+            [honda.pk, 'Honda', 'N/A', '85,000 km', 'Yes', 'seller', honda.created_at.strftime('%Y-%m-%d %H:%M')],
+        )
+        # Non-field columns go through attribute access
+        rows = list(ExportService.iter_rows(queryset, ['id', 'get_verification_state_display']))
+        self.assertEqual(len(rows), 2)
+
+    def test_csv(self):
+        import csv
+        rows = list(csv.reader(io.StringIO(self.export('csv').decode())))
+        # Columns without a label keep their name
+        self.assertEqual(rows[0], ['ID', 'Make', 'Price', 'Mileage', 'is_visible', 'Owner', 'Created At'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row[1] for row in rows[1:]}, {'Toyota', 'Honda'})
+
+    def test_excel_and_pdf(self):
+        self.assertTrue(self.export('excel').startswith(b'PK'))
+        self.assertTrue(self.export('pdf').startswith(b'%PDF'))
+
+    def test_columnar(self):
+        from .exports import PYARROW_AVAILABLE
+        if not PYARROW_AVAILABLE:
+            self.skipTest("pyarrow not installed")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pq.read_table(io.BytesIO(self.export('parquet', columnar=True)))
+        self.assertEqual(table.num_rows, 2)
+        # Raw values: a missing price is null rather than 'N/A'
+        self.assertEqual(table.column('price').null_count, 1)
+        self.assertEqual(table.column('is_visible').to_pylist(), [True, True])
+        arrow = pa.ipc.open_file(pa.BufferReader(self.export('arrow', columnar=True))).read_all()
+        self.assertEqual(sorted(arrow.column('make').to_pylist()), ['Honda', 'Toyota'])
+
+
+class VehicleListSerializerTests(TestCase):
+    def test_image_urls_come_from_the_storage(self):
+        from django.core.files.storage import default_storage
+        from .models import Vehicle
+        from .serializers import VehicleListSerializer
+        vehicle = make_vehicle(make_user('seller'))
+        self.assertIsNone(VehicleListSerializer(vehicle).data['main_image'])
+
+        Vehicle.objects.filter(pk=vehicle.pk).update(primary_image='vehicles/front.jpg')
+        data = VehicleListSerializer(Vehicle.objects.get(pk=vehicle.pk)).data
+        self.assertEqual(data['main_image'], default_storage.url('vehicles/front.jpg'))
+        # Falls back to the full image until the thumbnail exists
+        self.assertEqual(data['main_thumbnail'], data['main_image'])
+
+        Vehicle.objects.filter(pk=vehicle.pk).update(primary_thumbnail='thumbnails/front.jpg')
+        data = VehicleListSerializer(Vehicle.objects.get(pk=vehicle.pk)).data
+        self.assertEqual(data['main_thumbnail'], default_storage.url('thumbnails/front.jpg'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ExportJobTests(TestCase):
+    def setUp(self):
+        from .models import ExportJob
+        self.user = make_user('admin', is_staff=True)
+        make_vehicle(self.user)
+        self.job = ExportJob.objects.create(
+            user=self.user, export_type='csv', data_type='vehicles', columns=['id', 'make'],
+        )
+
+    def test_job_runs_once(self):
+        from .exports import run_export_job
+        from .models import ExportLog
+        job = run_export_job(self.job.pk)
+        self.assertEqual((job.status, job.record_count), ('completed', 1))
+        self.assertTrue(job.file.name.endswith('.csv'))
+        job.file.delete(save=False)
+
+        # A redelivered task finds the job already claimed
+        self.assertEqual(run_export_job(self.job.pk).status, 'completed')
+        self.assertEqual(ExportLog.objects.filter(job=self.job).count(), 1)
+
+    def test_job_claimed_elsewhere_is_left_alone(self):
+        from .exports import run_export_job
+        from .models import ExportJob
+        ExportJob.objects.filter(pk=self.job.pk).update(status='running')
+        job = run_export_job(self.job.pk)
+        self.assertEqual(job.status, 'running')
+        self.assertIsNone(job.started_at)
+        self.assertFalse(job.file)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TrendingVehiclesTests(TestCase):
+    url = '/core/marketplace/trending/'
+
+    def setUp(self):
+        from django.utils import timezone
+        from .models import VehicleViewDaily
+        owner = make_user('seller')
+        self.popular = make_vehicle(owner)
+        self.quiet = make_vehicle(owner)
+        VehicleViewDaily.objects.create(vehicle=self.popular, date=timezone.localdate(), views=9)
+        VehicleViewDaily.objects.create(vehicle=self.quiet, date=timezone.localdate(), views=2)
+
+    def leaderboard(self, entries, epoch):
+        """Patch the Redis client behind the trending index to return entries and epoch."""
+        from unittest import mock
+        client = mock.Mock()
+        client.pipeline.return_value.execute.return_value = (entries, epoch)
+        return mock.patch('core.analytics.trending.get_redis', return_value=client)
+
+    def test_missing_epoch_falls_back_to_rollups(self):
+        with self.leaderboard([(str(self.quiet.pk).encode(), 50.0)], None):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.json()['results']], [self.popular.pk, self.quiet.pk])
+
+    def test_leaderboard_scores_are_decayed(self):
+        import time
+        from django.conf import settings
+        half_life = settings.TRENDING_HALF_LIFE_HOURS * 60 * 60
+        with self.leaderboard([(str(self.quiet.pk).encode(), 50.0)], str(time.time() - half_life).encode()):
+            response = self.client.get(self.url)
+        results = response.json()['results']
+        self.assertEqual([item['id'] for item in results], [self.quiet.pk])
+        # One half-life after the epoch
+        self.assertAlmostEqual(results[0]['trending_score'], 25.0, places=1)
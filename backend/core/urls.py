@@ -11,12 +11,16 @@ from .views import (
     RegisterView,
     CustomTokenObtainPairView,
     MarketplaceView,
+    MarketplaceCacheStatsView,
+    MarketplaceFacetsView,
     InstantSaleViewSet,
     ProfileView,
     UserViewSet,
     PublicVehicleViewSet,
     TrackVehicleView,
     MarketplaceStatsView,
+    TrendingVehiclesView,
+    ViewIngestionStatsView,
     VehicleViewsView,
     DashboardStatsView,
     NotificationPreferencesView,
@@ -24,6 +28,9 @@ from .views import (
     ExportBidsView,
     ExportConfigurationViewSet,
     ExportLogsView,
+    ExportJobListView,
+    ExportJobDetailView,
+    ExportJobDownloadView,
     vehicle_id_list,
 )
 from .notification_views import NotificationViewSet
@@ -96,6 +103,8 @@ urlpatterns = [
 
     # Marketplace
     path('marketplace/', MarketplaceView.as_view(), name='marketplace'),
+    path('marketplace/facets/', MarketplaceFacetsView.as_view(), name='marketplace-facets'),
+    path('marketplace/trending/', TrendingVehiclesView.as_view(), name='marketplace-trending'),
 
     # Quotes
     path('vehicles/<int:vehicle_id>/request-quote/', QuoteRequestView.as_view(), name='request-quote'),
@@ -107,11 +116,16 @@ urlpatterns = [
     path('analytics/marketplace-stats/', MarketplaceStatsView.as_view(), name='marketplace-stats'),
     path('analytics/vehicle-views/<int:vehicle_id>/', VehicleViewsView.as_view(), name='vehicle-views'),
     path('stats/dashboard/', DashboardStatsView.as_view(), name='dashboard-stats'),
+    path('stats/marketplace-cache/', MarketplaceCacheStatsView.as_view(), name='marketplace-cache-stats'),
+    path('stats/view-ingestion/', ViewIngestionStatsView.as_view(), name='view-ingestion-stats'),
 
     # Export endpoints
     path('exports/vehicles/', ExportVehiclesView.as_view(), name='export-vehicles'),
     path('exports/bids/', ExportBidsView.as_view(), name='export-bids'),
     path('exports/logs/', ExportLogsView.as_view(), name='export-logs'),
+    path('exports/jobs/', ExportJobListView.as_view(), name='export-jobs'),
+    path('exports/jobs/<int:job_id>/', ExportJobDetailView.as_view(), name='export-job-detail'),
+    path('exports/jobs/<int:job_id>/download/', ExportJobDownloadView.as_view(), name='export-job-download'),
 
     # Search endpoints (Elasticsearch)
     path('search/', VehicleSearchView.as_view(), name='vehicle-search'),
@@ -3,7 +3,7 @@ from urllib.parse import urlencode
 from django.core.cache import cache
 from rest_framework import viewsets, permissions, serializers
 from .models import QuoteRequest, Vehicle, Bid, Profile, User, VehicleSearch, NotificationPreference, VehicleDraft
-from .models import VehicleView, VehicleImage
+from .models import VehicleView, VehicleImage, LIVE_MARKETPLACE_VEHICLE, PUBLIC_VEHICLE
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from .serializers import (
@@ -24,15 +24,27 @@ from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from .models import Vehicle, VehicleView
 from django.conf import settings
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .permissions import IsOwnerOrAdmin
+from .caching import marketplace_cache, vehicle_detail_cache
+from .pagination import KeysetPagination
+from .facets import facet_index
+from .conditional import marketplace_conditional, vehicle_conditional, vehicle_updated_at
+from .analytics.tracking import view_buffer
+from .analytics.bots import traffic_filter
+from .analytics.identity import set_visitor_cookie, visitor_id
+from .analytics.uniques import unique_visitors
+from .analytics.dashboard import dashboard_stats
+from .analytics.trending import trending_index
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Q
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import action
 from django.core.mail import EmailMessage
@@ -41,17 +53,17 @@ from django.core.mail import send_mail
 from django.utils.html import strip_tags
 from django.conf import settings
 from django.utils import timezone
-from .tasks import send_vehicle_approved_email, send_vehicle_rejected_email
+from .tasks import send_vehicle_approved_email, send_vehicle_rejected_email, queue_primary_thumbnail
 from xhtml2pdf import pisa
 from io import BytesIO
 import logging
-from django.contrib.postgres.search import SearchVector
+from .search.database import full_text_search
 # views.py
 import qrcode
 from io import BytesIO
 import base64
 from django.template.loader import render_to_string
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.core.mail import EmailMessage
 from xhtml2pdf import pisa
 from PIL import Image, ImageDraw
@@ -182,6 +194,15 @@ class PublicVehicleViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         return Vehicle.objects.select_related('owner').prefetch_related('images', 'bids__bidder')
 
+    @vehicle_conditional
+    def retrieve(self, request, *args, **kwargs):
+        # 304 straight from updated_at when the client's copy is current,
+        # otherwise the cached payload for this version of the vehicle
+        updated_at = vehicle_updated_at(request, kwargs)
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(vehicle_detail_payload(kwargs['pk'], updated_at))
+
 class VehicleViewSet(viewsets.ModelViewSet):
     serializer_class = VehicleSerializer
     permission_classes = [permissions.AllowAny]
@@ -288,8 +309,13 @@ class VehicleViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
     def pending_verification(self, request):
-        """Get vehicles pending verification with pagination."""
+        """Get vehicles pending verification with pagination (?pagination=cursor for keyset)."""
         queryset = Vehicle.objects.filter(verification_state="pending").order_by('-created_at')
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination(ordering=('-created_at', '-id'))
+            page = paginator.paginate_queryset(queryset, request)
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -316,6 +342,41 @@ class VehicleViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(vehicle)
         return Response(serializer.data)
 
+    @action(detail=True, methods=["post"], url_path="reorder-images")
+    def reorder_images(self, request, pk=None):
+        """Set image display order from a list of image ids; the first becomes primary."""
+        vehicle = self.get_object()
+        image_ids = request.data.get("image_ids")
+        if not isinstance(image_ids, list):
+            return Response(
+                {"image_ids": "A list of image ids is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        images = {image.id: image for image in vehicle.images.all()}
+        try:
+            ordered = [images.pop(int(image_id)) for image_id in image_ids]
+        except (KeyError, TypeError, ValueError):
+            return Response(
+                {"image_ids": "Unknown image id for this vehicle"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Images not mentioned keep their relative order after the listed ones
+        ordered += sorted(images.values(), key=lambda image: (image.position, image.id))
+        for position, image in enumerate(ordered):
+            image.position = position
+        VehicleImage.objects.bulk_update(ordered, ['position'])
+
+        # bulk_update skips signals, so sync the primary image here
+        if vehicle.refresh_primary_image():
+            marketplace_cache.invalidate_vehicle(vehicle)
+            transaction.on_commit(lambda: queue_primary_thumbnail(vehicle.id))
+        else:
+            vehicle.touch()
+
+        serializer = VehicleImageSerializer(ordered, many=True)
+        return Response(serializer.data)
+
     @action(detail=False, methods=["get"], url_path="instant-sales")
     def instant_sales(self, request):
         """Get instant sale vehicles with pagination."""
@@ -506,10 +567,7 @@ class VehicleSearchViewSet(viewsets.ModelViewSet):
 @permission_classes([AllowAny])
 def vehicle_id_list(request):
     # Only get vehicles that are verified and visible
-    vehicle_ids = Vehicle.objects.filter(
-        verification_state="physical", 
-        is_visible=True
-    ).values_list('id', flat=True)
+    vehicle_ids = Vehicle.objects.filter(PUBLIC_VEHICLE).values_list('id', flat=True)
     
     # Return as strings for URL construction: ["1", "2", "3"]
     return Response([str(id) for id in vehicle_ids])
@@ -541,8 +599,13 @@ class BidViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
     def all_bids(self, request):
-        """Get all bids with pagination (admin only)."""
+        """Get all bids with pagination (admin only, ?pagination=cursor for keyset)."""
         queryset = Bid.objects.all().select_related('vehicle', 'bidder').order_by('-created_at')
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination(ordering=('-created_at', '-id'))
+            page = paginator.paginate_queryset(queryset, request)
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -581,26 +644,24 @@ class MarketplaceView(APIView):
     permission_classes = [permissions.AllowAny]
     pagination_class = MarketplacePagination
 
+    @marketplace_conditional
     def get(self, request):
-        # Create consistent cache key with sorted query parameters
-        query_params = request.query_params.dict()
-        sorted_params = sorted(query_params.items())
-        canonical_query = urlencode(sorted_params)
-        cache_key = f"marketplace_{canonical_query}"
-        
-        # Try to get cached response
-        cached_data = cache.get(cache_key)
-        if cached_data is not None:
-            return Response(cached_data)
+        # Versioned cache key: scoped to the make/body type filter when present
+        # so unrelated vehicle changes don't evict this page
+        cache_key = marketplace_cache.key_for(request.query_params.dict())
+
+        # Serve from cache; on expiry keep serving the stale page while a
+        # single worker rebuilds it, and coalesce concurrent misses
+        response_data = marketplace_cache.get_or_compute(
+            cache_key, lambda: self.build_response_data(request)
+        )
+        return Response(response_data)
 
+    def build_response_data(self, request):
         # Build and filter queryset
-        vehicles = Vehicle.objects.filter(
-            verification_state="physical", 
-            is_visible=True, 
-            listing_type="marketplace"
-        ).select_related('owner').prefetch_related('images').only(
-            'id', 'make', 'model', 'year', 'price', 'body_type', 'mileage', 'fuel_type',
-            'location', 'created_at', 'owner__username'
+        vehicles = Vehicle.objects.filter(LIVE_MARKETPLACE_VEHICLE).select_related('owner').only(
+            'id', 'make', 'model', 'year', 'price', 'body_type', 'mileage', 'mileage_km', 'fuel_type',
+            'location', 'created_at', 'primary_image', 'primary_thumbnail', 'owner__username'
         )
 
         # Apply filters
@@ -624,21 +685,49 @@ class MarketplaceView(APIView):
         body_type = request.query_params.get("body_type")
         if body_type:
             vehicles = vehicles.filter(body_type__iexact=body_type)
+        min_mileage = request.query_params.get("minMileage")
+        if min_mileage and min_mileage.isdigit():
+            vehicles = vehicles.filter(mileage_km__gte=int(min_mileage))
+        max_mileage = request.query_params.get("maxMileage")
+        if max_mileage and max_mileage.isdigit():
+            vehicles = vehicles.filter(mileage_km__lte=int(max_mileage))
         search_term = request.query_params.get("search_term")
         if search_term:
-            # Use PostgreSQL full-text search if available
-            vehicles = vehicles.annotate(
-                search=SearchVector('make', 'model', 'description')
-            ).filter(search=search_term)
+            # Matches against the stored, GIN-indexed search vector
+            vehicles = full_text_search(vehicles, search_term)
 
-        # Sorting
+        # Sorting (id breaks ties so the order is stable for keyset pagination)
         sort_by = request.query_params.get("sortBy")
         if sort_by == "priceLowHigh":
-            vehicles = vehicles.order_by("price")
+            ordering = ("price", "id")
         elif sort_by == "priceHighLow":
-            vehicles = vehicles.order_by("-price")
+            ordering = ("-price", "-id")
+        elif sort_by == "mileageLowHigh":
+            ordering = ("mileage_km", "id")
+        elif sort_by == "mileageHighLow":
+            ordering = ("-mileage_km", "-id")
+        else:
+            ordering = ("-created_at", "-id")
+        # Rows without a value (e.g. mileage that couldn't be parsed) go last in
+        # both directions, matching the cursor predicate
+        keyset = KeysetPagination(
+            ordering=ordering,
+            page_size=self.pagination_class.page_size,
+            nulls_last=ordering[0].lstrip("-") in ("mileage_km", "price"),
+        )
+        cursor_mode = KeysetPagination.requested(request)
+        if search_term and not sort_by and not cursor_mode:
+            # Best matches first; a rank can't be used as a keyset cursor
+            vehicles = vehicles.order_by("-search_rank", *ordering)
         else:
-            vehicles = vehicles.order_by("-created_at")
+            vehicles = vehicles.order_by(*keyset.get_ordering())
+
+        # Opt-in cursor mode for infinite scroll: no COUNT(*) or OFFSET
+        if cursor_mode:
+            paginator = keyset
+            page = paginator.paginate_queryset(vehicles, request)
+            serializer = VehicleListSerializer(page, many=True, context={'request': request})
+            return paginator.get_paginated_data(serializer.data)
 
         # Paginate results
         paginator = self.pagination_class()
@@ -650,10 +739,75 @@ class MarketplaceView(APIView):
         response_data = response.data
         response_data['current_page'] = request.query_params.get('page', 1)
         response_data['page_size'] = paginator.get_page_size(request)
-        
-        # Cache and return
-        cache.set(cache_key, response_data, timeout=300)
-        return Response(response_data)
+        return response_data
+
+
+class MarketplaceFacetsView(APIView):
+    """Filter sidebar counts for every facet, conditioned on the active filters."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(facet_index.counts(request.query_params))
+
+
+class TrendingVehiclesView(APIView):
+    """Live vehicles with the most recent views and bids, decayed over time."""
+    permission_classes = [permissions.AllowAny]
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 50
+    # Window of view rollups used when the leaderboard is unavailable
+    FALLBACK_DAYS = 7
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.DEFAULT_LIMIT))
+        except ValueError:
+            limit = self.DEFAULT_LIMIT
+        limit = max(1, min(limit, self.MAX_LIMIT))
+
+        # Over-fetch: some leaders may have been sold or hidden since
+        ranked = trending_index.top(limit * 3)
+        if not ranked:
+            since = timezone.localdate() - timedelta(days=self.FALLBACK_DAYS)
+            ranked = VehicleViewDaily.objects.filter(date__gte=since).values('vehicle_id').annotate(
+                score=Sum('views')
+            ).order_by('-score').values_list('vehicle_id', 'score')[:limit * 3]
+        scores = dict(ranked)
+
+        vehicles = Vehicle.objects.filter(LIVE_MARKETPLACE_VEHICLE, pk__in=scores).select_related('owner').only(
+            'id', 'make', 'model', 'year', 'price', 'body_type', 'mileage', 'mileage_km', 'fuel_type',
+            'location', 'created_at', 'primary_image', 'primary_thumbnail', 'owner__username'
+        )
+        vehicles = sorted(vehicles, key=lambda vehicle: -scores[vehicle.pk])[:limit]
+        results = VehicleListSerializer(vehicles, many=True, context={'request': request}).data
+        for vehicle in results:
+            vehicle['trending_score'] = scores[vehicle['id']]
+        return Response({'results': results})
+
+
+class MarketplaceCacheStatsView(APIView):
+    """Hit/miss counters for the marketplace response cache."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(marketplace_cache.stats())
+
+    def delete(self, request):
+        """Reset the counters, e.g. before a load test."""
+        marketplace_cache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class ViewIngestionStatsView(APIView):
+    """How many view-tracking requests the bot filter recorded, sampled or dropped."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(traffic_filter.stats())
+
+    def delete(self, request):
+        """Reset the counters."""
+        traffic_filter.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 class InstantSaleViewSet(viewsets.ModelViewSet):
     serializer_class = VehicleSerializer
@@ -910,84 +1064,84 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+def vehicle_detail_payload(vehicle_id, updated_at):
+    """Serialized vehicle detail, cached per vehicle and updated_at."""
+    def serialize():
+        vehicle = Vehicle.objects.select_related('owner').prefetch_related('images').get(pk=vehicle_id)
+        return VehicleSerializer(vehicle).data
+
+    key = f"vehicle_detail:{vehicle_id}:{updated_at.timestamp()}"
+    return vehicle_detail_cache.get_or_compute(key, serialize)
+
+
+def record_vehicle_view(request, vehicle_id, ip):
+    """
+    Queue a view of vehicle_id unless the request is bot traffic.
+
+    Returns (queued, cookie): queued is None when the filter dropped the
+    request; cookie is a new visitor id to send back with set_visitor_cookie.
+    Anonymous visitors are keyed by that signed cookie or a daily
+    fingerprint, never by a session, so no session row is ever written.
+    """
+    if not traffic_filter.should_record(request, ip):
+        return None, None
+    if request.user.is_authenticated:
+        return view_buffer.record(vehicle_id, user_id=request.user.id, ip_address=ip), None
+    visitor, is_new = visitor_id(request, ip)
+    queued = view_buffer.record(vehicle_id, session_key=visitor, ip_address=ip)
+    return queued, visitor if is_new else None
+
+
 class VehicleDetailView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, vehicle_id):
-        vehicle = get_object_or_404(Vehicle, id=vehicle_id)
-        
-        # Track vehicle view
+        # Read-only: one primary-key lookup, then the view event is queued for
+        # the batch writer and the payload comes from the per-vehicle cache
+        updated_at = Vehicle.objects.filter(id=vehicle_id).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            raise Http404("No Vehicle matches the given query.")
+
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         ip = x_forwarded_for.split(',')[0] if x_forwarded_for else request.META.get('REMOTE_ADDR')
-        
-        VehicleView.objects.create(
-            vehicle=vehicle,
-            session_key=request.session.session_key,
-            user=request.user if request.user.is_authenticated else None,
-            ip_address=ip
-        )
-        
-        serializer = VehicleSerializer(vehicle)
-        return Response(serializer.data)
+        # Crawlers still get the page, but their views aren't recorded
+        _, cookie = record_vehicle_view(request, vehicle_id, ip)
+
+        response = self.vehicle_response(request, vehicle_id=vehicle_id, updated_at=updated_at)
+        if cookie:
+            set_visitor_cookie(response, cookie)
+        return response
+
+    @vehicle_conditional
+    def vehicle_response(self, request, vehicle_id, updated_at):
+        # The view is queued above; only the body is skipped on a 304
+        return Response(vehicle_detail_payload(vehicle_id, updated_at))
 
 class TrackVehicleView(APIView):
     permission_classes = [permissions.AllowAny]
-    
+
     def post(self, request, vehicle_id):
-        # Get the vehicle object or return 404
-        vehicle = get_object_or_404(Vehicle, id=vehicle_id)
-        
-        # Get client IP address
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        ip_address = x_forwarded_for.split(',')[0] if x_forwarded_for \
-            else request.META.get('REMOTE_ADDR')
-        
-        # Get session key (create one if doesn't exist)
-        session_key = request.session.session_key
-        if not session_key:
-            request.session.create()
-            session_key = request.session.session_key
-        
-        # Check if this is a unique view (same session/user hasn't viewed in last 30 minutes)
-        time_threshold = timezone.now() - timezone.timedelta(minutes=30)
-        
-        existing_view = VehicleView.objects.filter(
-            vehicle=vehicle,
-            session_key=session_key,
-            timestamp__gte=time_threshold
-        ).first()
-        
-        if request.user.is_authenticated:
-            user_view = VehicleView.objects.filter(
-                vehicle=vehicle,
-                user=request.user,
-                timestamp__gte=time_threshold
-            ).first()
-            if user_view:
-                existing_view = user_view
-        
-        # If no recent view exists, create a new one
-        if not existing_view:
-            VehicleView.objects.create(
-                vehicle=vehicle,
-                session_key=session_key,
-                user=request.user if request.user.is_authenticated else None,
-                ip_address=ip_address
-            )
-            
-            # Increment view count (using atomic update)
-            vehicle.view_count = models.F('view_count') + 1
-            vehicle.save(update_fields=['view_count'])
-            
-            return Response(
-                {'status': 'View tracked', 'view_count': vehicle.view_count + 1},
-                status=status.HTTP_201_CREATED
+        # One primary-key lookup for the 404 and the persisted count, then
+        # dedupe and queue in Redis; the periodic flush writes VehicleView rows
+        # and view_count. No session is ever created (see record_vehicle_view).
+        view_count = Vehicle.objects.filter(id=vehicle_id).values_list('view_count', flat=True).first()
+        if view_count is None:
+            raise Http404("No Vehicle matches the given query.")
+
+        queued, cookie = record_vehicle_view(request, vehicle_id, self.get_client_ip(request))
+        # view_count lags by the views still waiting for the next flush
+        if queued is None:
+            response = Response({'status': 'View not tracked', 'view_count': view_count}, status=status.HTTP_200_OK)
+        elif queued:
+            response = Response({'status': 'View tracked', 'view_count': view_count + 1}, status=status.HTTP_201_CREATED)
+        else:
+            response = Response(
+                {'status': 'View already recorded recently', 'view_count': view_count},
+                status=status.HTTP_200_OK,
             )
-        
-        return Response(
-            {'status': 'View already recorded recently', 'view_count': vehicle.view_count},
-            status=status.HTTP_200_OK
-        )
+        if cookie:
+            set_visitor_cookie(response, cookie)
+        return response
 
     def get_client_ip(self, request):
         """More robust IP address getter"""
@@ -998,69 +1152,91 @@ class TrackVehicleView(APIView):
             ip = request.META.get('REMOTE_ADDR')
         return ip
 
-from .models import WebsiteVisit, VehicleView
-from django.db.models import Count, F, ExpressionWrapper, DurationField
+from .models import WebsiteVisit, VehicleView, VehicleViewDaily, PathVisitDaily
+from django.db.models import Count, Sum, F, ExpressionWrapper, DurationField
 from django.utils import timezone
 from datetime import timedelta
 
 class MarketplaceStatsView(APIView):
+    # Reads the daily rollups (core.analytics.rollups), not the raw rows
     def get(self, request):
         # Total marketplace visits (last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        marketplace_visits = WebsiteVisit.objects.filter(
-            timestamp__gte=thirty_days_ago,
+        thirty_days_ago = timezone.localdate() - timedelta(days=30)
+        marketplace_visits = PathVisitDaily.objects.filter(
+            date__gte=thirty_days_ago,
             path__contains="/marketplace"
-        ).count()
+        ).aggregate(total=Sum('visits'))['total'] or 0
 
         # Vehicle views (last 30 days)
-        vehicle_views = VehicleView.objects.filter(
-            timestamp__gte=thirty_days_ago
-        ).count()
+        vehicle_views = VehicleViewDaily.objects.filter(
+            date__gte=thirty_days_ago
+        ).aggregate(total=Sum('views'))['total'] or 0
 
         # Popular vehicles
-        popular_vehicles = VehicleView.objects.filter(
-            timestamp__gte=thirty_days_ago
+        popular_vehicles = VehicleViewDaily.objects.filter(
+            date__gte=thirty_days_ago
         ).values(
             'vehicle__id',
             'vehicle__make',
             'vehicle__model',
             'vehicle__year'
         ).annotate(
-            view_count=Count('id')
+            view_count=Sum('views')
         ).order_by('-view_count')[:5]
+        popular_vehicles = list(popular_vehicles)
+
+        # Approximate distinct viewers (HyperLogLog), site-wide and per vehicle
+        today = timezone.localdate()
+        unique_viewers = unique_visitors.count_many(
+            [None] + [vehicle['vehicle__id'] for vehicle in popular_vehicles],
+            thirty_days_ago, today
+        )
+        for vehicle in popular_vehicles:
+            vehicle['unique_viewers'] = unique_viewers[vehicle['vehicle__id']]
 
         return Response({
             "marketplace_visits": marketplace_visits,
             "vehicle_views": vehicle_views,
-            "popular_vehicles": list(popular_vehicles)
+            "unique_viewers": unique_viewers[None],
+            "popular_vehicles": popular_vehicles
         })
 
 class VehicleViewsView(APIView):
+    # Reads the daily rollups (core.analytics.rollups), not the raw rows
     def get(self, request, vehicle_id):
+        daily = VehicleViewDaily.objects.filter(vehicle_id=vehicle_id)
+
         # Total views for this vehicle
-        total_views = VehicleView.objects.filter(vehicle_id=vehicle_id).count()
+        total_views = daily.aggregate(total=Sum('views'))['total'] or 0
 
         # Views in the last 30 days
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_views = VehicleView.objects.filter(
-            vehicle_id=vehicle_id,
-            timestamp__gte=thirty_days_ago
-        ).count()
+        today = timezone.localdate()
+        recent_views = daily.filter(
+            date__gte=today - timedelta(days=30)
+        ).aggregate(total=Sum('views'))['total'] or 0
 
         # Views over time (last 7 days)
-        views_by_day = VehicleView.objects.filter(
-            vehicle_id=vehicle_id,
-            timestamp__gte=timezone.now() - timedelta(days=7)
-        ).extra({
-            'date': "date(timestamp)"
-        }).values('date').annotate(
-            views=Count('id')
-        ).order_by('date')
+        views_by_day = daily.filter(
+            date__gte=today - timedelta(days=7)
+        ).values('date', 'views').order_by('date')
+
+        # Approximate distinct viewers (HyperLogLog) over the same windows
+        recent_unique_viewers = unique_visitors.count(
+            vehicle_id, today - timedelta(days=30), today
+        )
+        unique_by_day = dict(unique_visitors.count_by_day(
+            vehicle_id, today - timedelta(days=7), today
+        ))
+        views_by_day = [
+            {**day, "unique_viewers": unique_by_day.get(day['date'], 0)}
+            for day in views_by_day
+        ]
 
         return Response({
             "total_views": total_views,
             "recent_views": recent_views,
-            "views_by_day": list(views_by_day)
+            "recent_unique_viewers": recent_unique_viewers,
+            "views_by_day": views_by_day
         })
 
 
@@ -1069,196 +1245,122 @@ class DashboardStatsView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request):
-        from django.db.models import Sum, Avg
-
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        seven_days_ago = timezone.now() - timedelta(days=7)
-
-        # Vehicle statistics
-        total_vehicles = Vehicle.objects.count()
-        pending_vehicles = Vehicle.objects.filter(verification_state='pending').count()
-        verified_vehicles = Vehicle.objects.filter(verification_state='physical').count()
-        rejected_vehicles = Vehicle.objects.filter(verification_state='rejected').count()
-        marketplace_vehicles = Vehicle.objects.filter(listing_type='marketplace').count()
-        instant_sale_vehicles = Vehicle.objects.filter(listing_type='instant_sale').count()
-
-        # Bid statistics
-        total_bids = Bid.objects.count()
-        pending_bids = Bid.objects.filter(status='pending').count()
-        accepted_bids = Bid.objects.filter(status='accepted').count()
-        total_bid_value = Bid.objects.aggregate(total=Sum('amount'))['total'] or 0
-
-        # User statistics
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        new_users_this_month = User.objects.filter(date_joined__gte=thirty_days_ago).count()
-
-        # Traffic statistics
-        marketplace_visits = WebsiteVisit.objects.filter(
-            timestamp__gte=thirty_days_ago,
-            path__contains="/marketplace"
-        ).count()
-        vehicle_views = VehicleView.objects.filter(
-            timestamp__gte=thirty_days_ago
-        ).count()
-
-        # Recent activity (last 7 days)
-        new_vehicles_this_week = Vehicle.objects.filter(created_at__gte=seven_days_ago).count()
-        new_bids_this_week = Bid.objects.filter(created_at__gte=seven_days_ago).count()
-        new_users_this_week = User.objects.filter(date_joined__gte=seven_days_ago).count()
-
-        # Vehicles by state breakdown
-        vehicles_by_state = list(Vehicle.objects.values('verification_state').annotate(
-            count=Count('id')
-        ))
+        # Shared with DashboardStatsConsumer and cached for a few seconds
+        return Response(dashboard_stats())
+
+
+def _export_filters(data_type, params, user):
+    """
+    Filters for an export from request params. A ``since_export`` (an
+    ExportLog id, or 'latest') makes it a delta export; raises ValueError
+    if that export doesn't exist.
+    """
+    from .exports import ExportService
+    filters = {field: params.get(field) for field in ExportService.FILTERS.get(data_type, ())}
+    since_export = params.get('since_export')
+    if since_export:
+        filters['since_export'] = ExportService.resolve_since_export(data_type, since_export, user)
+    return filters
+
+
+def _sync_export(request, data_type):
+    """Build an export inside the request and log it."""
+    from .exports import ExportService, log_export
+
+    export_format = request.query_params.get('format', 'csv')
+    if not ExportService.is_available(export_format):
+        return Response({'error': f'{export_format} exports are not available'}, status=status.HTTP_400_BAD_REQUEST)
+    columns = ExportService.resolve_columns(data_type, request.user, request.query_params.get('config_id'))
+    try:
+        filters = _export_filters(data_type, request.query_params, request.user)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Read before the query, so changes made while exporting land in the next delta
+    watermark = timezone.now()
+    rows, column_headers, record_count = ExportService.prepare_export(
+        data_type, columns, filters, columnar=export_format in ExportService.COLUMNAR_TYPES
+    )
 
-        # Top vehicles by views
-        top_vehicles = list(VehicleView.objects.filter(
-            timestamp__gte=thirty_days_ago
-        ).values(
-            'vehicle__id',
-            'vehicle__make',
-            'vehicle__model',
-            'vehicle__year'
-        ).annotate(
-            view_count=Count('id')
-        ).order_by('-view_count')[:5])
+    # Generate export
+    filename = f"{data_type}_export_{watermark.strftime('%Y%m%d_%H%M%S')}"
+    response = ExportService.response(
+        export_format, rows, column_headers, filename, ExportService.TITLES[data_type]
+    )
 
-        return Response({
-            'vehicles': {
-                'total': total_vehicles,
-                'pending': pending_vehicles,
-                'verified': verified_vehicles,
-                'rejected': rejected_vehicles,
-                'marketplace': marketplace_vehicles,
-                'instant_sale': instant_sale_vehicles,
-                'new_this_week': new_vehicles_this_week,
-                'by_state': vehicles_by_state,
-            },
-            'bids': {
-                'total': total_bids,
-                'pending': pending_bids,
-                'accepted': accepted_bids,
-                'total_value': total_bid_value,
-                'new_this_week': new_bids_this_week,
-            },
-            'users': {
-                'total': total_users,
-                'active': active_users,
-                'new_this_month': new_users_this_month,
-                'new_this_week': new_users_this_week,
-            },
-            'traffic': {
-                'marketplace_visits': marketplace_visits,
-                'vehicle_views': vehicle_views,
-                'top_vehicles': top_vehicles,
-            }
-        })
+    # Log the export
+    log_export(
+        user=request.user,
+        export_type=export_format,
+        data_type=data_type,
+        record_count=record_count,
+        filters=filters,
+        ip_address=request.META.get('REMOTE_ADDR'),
+        watermark=watermark,
+    )
+
+    return response
+
+
+def _queue_export(request, data_type):
+    """Create an export job and hand it to a worker; returns 202 with the job status."""
+    from .exports import ExportService, export_job_data
+    from .models import ExportJob
+    from .tasks import queue_export_job
+
+    params = request.data or request.query_params
+    export_format = params.get('format', 'csv')
+    if export_format not in ExportService.FILE_EXTENSIONS:
+        return Response({'error': f'Unsupported format: {export_format}'}, status=status.HTTP_400_BAD_REQUEST)
+    if not ExportService.is_available(export_format):
+        return Response({'error': f'{export_format} exports are not available'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        filters = _export_filters(data_type, params, request.user)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    job = ExportJob.objects.create(
+        user=request.user,
+        export_type=export_format,
+        data_type=data_type,
+        columns=ExportService.resolve_columns(data_type, request.user, params.get('config_id')),
+        filters=filters,
+        ip_address=request.META.get('REMOTE_ADDR'),
+    )
+    transaction.on_commit(lambda: queue_export_job(job.id))
+
+    response = Response(export_job_data(job), status=status.HTTP_202_ACCEPTED)
+    response['Location'] = reverse('export-job-detail', args=[job.id])
+    return response
 
 
 class ExportVehiclesView(APIView):
-    """Export vehicles to CSV, Excel, or PDF."""
+    """
+    Export vehicles to CSV, Excel, PDF, Parquet or Arrow IPC.
+
+    GET builds the file in the request; POST queues an export job and
+    returns its status, to be polled or followed over the notifications
+    WebSocket. Either takes ``since_export`` (an export log id, or 'latest')
+    for a delta export of only the rows changed or deleted since then.
+    """
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request):
-        from .exports import ExportService, log_export
-        from .models import ExportConfiguration
-
-        export_format = request.query_params.get('format', 'csv')
-        config_id = request.query_params.get('config_id')
+        return _sync_export(request, 'vehicles')
 
-        # Get columns to export
-        if config_id:
-            try:
-                config = ExportConfiguration.objects.get(id=config_id, user=request.user)
-                columns = config.columns
-            except ExportConfiguration.DoesNotExist:
-                columns = list(ExportService.VEHICLE_COLUMNS.keys())
-        else:
-            columns = list(ExportService.VEHICLE_COLUMNS.keys())
-
-        column_headers = [ExportService.VEHICLE_COLUMNS.get(col, col) for col in columns]
-
-        # Build queryset with filters
-        queryset = Vehicle.objects.select_related('owner').order_by('-created_at')
-
-        # Apply filters
-        verification_state = request.query_params.get('verification_state')
-        if verification_state:
-            queryset = queryset.filter(verification_state=verification_state)
-
-        listing_type = request.query_params.get('listing_type')
-        if listing_type:
-            queryset = queryset.filter(listing_type=listing_type)
-
-        # Generate export
-        filename = f"vehicles_export_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
-        record_count = queryset.count()
-
-        if export_format == 'excel':
-            response = ExportService.export_to_excel(queryset, columns, column_headers, filename)
-        elif export_format == 'pdf':
-            response = ExportService.export_to_pdf(queryset, columns, column_headers, filename, "Vehicle Export")
-        else:
-            response = ExportService.export_to_csv(queryset, columns, column_headers, filename)
-
-        # Log the export
-        log_export(
-            user=request.user,
-            export_type=export_format,
-            data_type='vehicles',
-            record_count=record_count,
-            filters={
-                'verification_state': verification_state,
-                'listing_type': listing_type,
-            },
-            ip_address=request.META.get('REMOTE_ADDR'),
-        )
-
-        return response
+    def post(self, request):
+        return _queue_export(request, 'vehicles')
 
 
 class ExportBidsView(APIView):
-    """Export bids to CSV, Excel, or PDF."""
+    """Export bids in any export format (POST queues an export job; see ExportVehiclesView)."""
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request):
-        from .exports import ExportService, log_export
-
-        export_format = request.query_params.get('format', 'csv')
-        columns = list(ExportService.BID_COLUMNS.keys())
-        column_headers = [ExportService.BID_COLUMNS.get(col, col) for col in columns]
-
-        # Build queryset
-        queryset = Bid.objects.select_related('vehicle', 'bidder').order_by('-created_at')
+        return _sync_export(request, 'bids')
 
-        # Apply filters
-        status_filter = request.query_params.get('status')
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-
-        # Generate export
-        filename = f"bids_export_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
-        record_count = queryset.count()
-
-        if export_format == 'excel':
-            response = ExportService.export_to_excel(queryset, columns, column_headers, filename)
-        elif export_format == 'pdf':
-            response = ExportService.export_to_pdf(queryset, columns, column_headers, filename, "Bids Export")
-        else:
-            response = ExportService.export_to_csv(queryset, columns, column_headers, filename)
-
-        # Log the export
-        log_export(
-            user=request.user,
-            export_type=export_format,
-            data_type='bids',
-            record_count=record_count,
-            filters={'status': status_filter},
-            ip_address=request.META.get('REMOTE_ADDR'),
-        )
-
-        return response
+    def post(self, request):
+        return _queue_export(request, 'bids')
 
 
 class ExportConfigurationViewSet(viewsets.ModelViewSet):
@@ -1320,7 +1422,55 @@ class ExportLogsView(APIView):
             'data_type': log.data_type,
             'record_count': log.record_count,
             'created_at': log.created_at,
+            'watermark': log.watermark,
             'user': log.user.username,
         } for log in logs]
 
-        return Response(data)
\ No newline at end of file
+        return Response(data)
+
+
+def _export_jobs_for(user):
+    from .models import ExportJob
+    jobs = ExportJob.objects.all()
+    if not user.is_staff:
+        jobs = jobs.filter(user=user)
+    return jobs
+
+
+class ExportJobListView(APIView):
+    """Recent export jobs for the current user."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        from .exports import export_job_data
+        from .models import ExportJob
+        jobs = ExportJob.objects.filter(user=request.user)[:50]
+        return Response([export_job_data(job) for job in jobs])
+
+
+class ExportJobDetailView(APIView):
+    """Status and progress of one export job."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id):
+        from .exports import export_job_data
+        job = get_object_or_404(_export_jobs_for(request.user), pk=job_id)
+        return Response(export_job_data(job))
+
+
+class ExportJobDownloadView(APIView):
+    """Stream a completed export job's file from storage."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id):
+        from django.http import FileResponse
+        import os
+
+        job = get_object_or_404(_export_jobs_for(request.user), pk=job_id)
+        if job.status != 'completed' or not job.file:
+            return Response({'error': 'Export is not ready', 'status': job.status}, status=status.HTTP_409_CONFLICT)
+        try:
+            handle = job.file.open('rb')
+        except FileNotFoundError:
+            raise Http404("Export file no longer exists")
+        return FileResponse(handle, as_attachment=True, filename=os.path.basename(job.file.name))